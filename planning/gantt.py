@@ -38,18 +38,24 @@ __author__ = "Alexandre Norman (norman at xael.org)"
 __version__ = "0.7.0"
 __last_modification__ = "2016.03.20"
 
+import bisect
+import calendar
 import codecs
+import collections
 import datetime
 import enum
+import gzip
+import io
+import itertools
 import logging
+import operator
 import re
 import sys
 import textwrap
-import types
+import xml.etree.ElementTree as ET
 from typing import Optional
 
 import svgwrite
-from dateutil.relativedelta import relativedelta
 
 # conversion from mm/cm to pixel is done by ourselve as firefox seems
 # to have a bug for big numbers...
@@ -59,6 +65,16 @@ cm = 35.43307
 px_to_mm = 0.264583
 px_to_cm = 0.0264583
 
+_ONE_DAY = datetime.timedelta(days=1)
+
+_CSV_HEADER = bytes.decode(codecs.BOM_UTF8, "utf-8") + (
+    '"State";"Task Name";"Start date";"End date";"Duration";"Resources";\r\n'
+)
+# Formats the CSV row of a task (state, name, start, end, duration, resources)
+_CSV_ROW = '"{0}";"{1}";{2};{3};{4};"{5}";\r\n'.format
+# CSV row of a task, or None for an empty sub project
+_TASK_CSV = operator.methodcaller("csv")
+
 
 class COLORS(enum.Enum):
     YEARS = "#9b9b9b"
@@ -72,31 +88,260 @@ class COLORS(enum.Enum):
 class _my_svgwrite_drawing_wrapper(svgwrite.Drawing):
     """
     Hack for beeing able to use a file descriptor as filename
+
+    XML validation of the drawing is disabled unless debug=True is given.
     """
 
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("debug", False)
+        super().__init__(*args, **kwargs)
+
     def save(self, width="100%", height="100%"):
         """Write the XML string to **filename**."""
-        test = False
-        import io
-
         # Fix height and width
-        self["height"] = height
-        self["width"] = width
+        self["height"] = _fmt(height)
+        self["width"] = _fmt(width)
+        for element in self.elements:
+            if isinstance(element, svgwrite.base.BaseElement):
+                _round_svg_element(element)
+
+        # XML header and document (no stylesheets here), joined once
+        parts = ['<?xml version="1.0" encoding="utf-8" ?>\n', self.tostring()]
+        svg_text = "".join(parts)
+
+        if hasattr(self.filename, "write"):
+            self.filename.write(svg_text)
+        else:
+            data = svg_text.encode("utf-8")
+            with io.open(str(self.filename), mode="wb", buffering=1 << 20) as fileobj:
+                fileobj.write(data)
 
-        if sys.version_info[0] == 2:
-            test = (
-                type(self.filename) == types.FileType
-                or type(self.filename) == types.InstanceType
-            )
-        elif sys.version_info[0] == 3:
-            test = type(self.filename) == io.TextIOWrapper
 
-        if test:
-            self.write(self.filename)
-        else:
-            fileobj = io.open(str(self.filename), mode="w", encoding="utf-8")
-            self.write(fileobj)
-            fileobj.close()
+def _svg_escape(text, quote=False):
+    """
+    Escape text (or attribute value if quote is True) like ElementTree does
+    """
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if quote:
+        text = text.replace('"', "&quot;").replace("\r", "&#13;")
+        text = text.replace("\n", "&#10;").replace("\t", "&#09;")
+    return text
+
+
+# attributes holding coordinates or lengths, written with 2 decimals at most
+_SVG_COORDINATES = frozenset(
+    ("x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "width", "height")
+)
+_LONG_DECIMAL = re.compile(r"\d+\.\d{3,}")
+# ids of the elements drawn several times with _svg_use
+_DAY_OFF_TEMPLATE_ID = "template_day_off"
+_VACATION_TEMPLATE_ID = "template_vacation"
+_OVERCHARGE_TEMPLATE_ID = "template_overcharge"
+# characters replaced by "_" in SVG ids built from task names
+_ID_TRANS = str.maketrans(dict.fromkeys(" ,'/()", "_"))
+
+
+def _fmt(value):
+    """
+    Returns SVG coordinate rounded to 2 decimals, without a trailing ".0" for
+    whole numbers. value may be a number or a svgwrite list of numbers already
+    converted to string.
+    """
+    if isinstance(value, float):
+        value = round(value, 2)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str):
+        return _LONG_DECIMAL.sub(lambda m: str(round(float(m.group()), 2)), value)
+    return value
+
+
+def _round_svg_element(element):
+    """
+    Round coordinates of a svgwrite element and its children to 2 decimals
+    """
+    attribs = element.attribs
+    for name in _SVG_COORDINATES.intersection(attribs):
+        attribs[name] = _fmt(attribs[name])
+    points = getattr(element, "points", None)
+    if points:
+        element.points = [(_fmt(x), _fmt(y)) for x, y in points]
+    for child in element.elements:
+        if isinstance(child, svgwrite.base.BaseElement):
+            _round_svg_element(child)
+
+
+def _svg_tostring(element):
+    """
+    Returns raw XML string of a svgwrite element with rounded coordinates,
+    raw XML strings and groups being returned as is
+    """
+    if isinstance(element, str):
+        return element
+    if isinstance(element, svgwrite.base.BaseElement):
+        _round_svg_element(element)
+    return element.tostring()
+
+
+def _svg_attributes(attribs):
+    """
+    Return attributes string from a dictionnary of svgwrite-like keyword
+    arguments (e.g. stroke_width for 'stroke-width'), serialized as svgwrite
+    does: sorted by name, None or empty values being skipped
+    """
+    attributes = []
+    for name, value in attribs.items():
+        if value is None:
+            continue
+        name = name.rstrip("_").replace("_", "-")
+        if name in _SVG_COORDINATES:
+            value = _fmt(value)
+        value = str(value)
+        if value:
+            attributes.append((name, value))
+    attributes.sort()
+    return "".join(
+        ' {0}="{1}"'.format(name, _svg_escape(value, quote=True))
+        for name, value in attributes
+    )
+
+
+def _svg_points(points):
+    """
+    Return the value of a SVG points attribute, coordinates being rounded to
+    2 decimals
+
+    Keyword arguments:
+    points -- list of (x, y) tuples
+    """
+    return " ".join("{0},{1}".format(_fmt(x), _fmt(y)) for x, y in points)
+
+
+def _svg_element(elementname, text=None, **attribs):
+    """
+    Return raw XML string of a SVG element
+
+    Keyword arguments:
+    elementname -- string, SVG element name (e.g. 'rect')
+    text -- string, text content of the element, default None
+    attribs -- SVG attributes as svgwrite-like keyword arguments
+    """
+    if text is None:
+        return "<{0}{1} />".format(elementname, _svg_attributes(attribs))
+    return "<{0}{1}>{2}</{0}>".format(
+        elementname, _svg_attributes(attribs), _svg_escape(text)
+    )
+
+
+def _svg_template(template_id, elementname, **attribs):
+    """
+    Return raw XML <defs> of a SVG element drawn several times with _svg_use
+
+    Keyword arguments:
+    template_id -- string, id of the element, unique in the drawing
+    elementname -- string, SVG element name (e.g. 'rect'), drawn at 0, 0
+    attribs -- SVG attributes as svgwrite-like keyword arguments
+    """
+    return "<defs>{0}</defs>".format(
+        _svg_element(elementname, id=template_id, **attribs)
+    )
+
+
+def _svg_use(template_id, x, y):
+    """
+    Return raw XML string drawing the element defined by _svg_template at x, y
+
+    Keyword arguments:
+    template_id -- string, id given to _svg_template
+    x -- x coordinate
+    y -- y coordinate
+    """
+    return '<use x="{0}" xlink:href="#{1}" y="{2}" />'.format(
+        _fmt(x), template_id, _fmt(y)
+    )
+
+
+# raw groups are parsed within this element to bind the xlink prefix of <use>
+_XLINK_NAMESPACE = "http://www.w3.org/1999/xlink"
+_XLINK_ROOT = '<svg xmlns:xlink="{0}">{{0}}</svg>'.format(_XLINK_NAMESPACE)
+_XLINK_HREF = "{{{0}}}href".format(_XLINK_NAMESPACE)
+
+
+class _raw_svg_group(object):
+    """
+    SVG group made of raw XML strings instead of svgwrite elements
+
+    It may be added to a svgwrite container like any other element, or be
+    written directly with _write_svg_direct. Elements added to the group are
+    serialized immediately, so they must not be modified afterwards.
+    """
+
+    elementname = "g"
+
+    def __init__(self, **attribs):
+        self.attribs = attribs
+        self.elements = []
+
+    def add(self, element):
+        """
+        Add an element to the group
+
+        Keyword arguments:
+        element -- raw XML string or svgwrite element
+        """
+        element = _svg_tostring(element)
+        self.elements.append(element)
+        return element
+
+    def tostring(self):
+        """Return the raw XML string of the group"""
+        if not self.elements:
+            return "<g{0} />".format(_svg_attributes(self.attribs))
+        return "<g{0}>{1}</g>".format(
+            _svg_attributes(self.attribs), "".join(self.elements)
+        )
+
+    def get_xml(self):
+        """Return the group as an ElementTree object (svgwrite interface)"""
+        text = self.tostring()
+        if "xlink:" not in text:
+            return ET.fromstring(text)
+        xml = ET.fromstring(_XLINK_ROOT.format(text))[0]
+        # keep the prefixed name svgwrite uses, the drawing declaring xlink
+        for element in xml.iter("use"):
+            element.set("xlink:href", element.attrib.pop(_XLINK_HREF))
+        return xml
+
+
+_SVG_HEADER = (
+    '<?xml version="1.0" encoding="utf-8" ?>\n'
+    '<svg baseProfile="full" height="{height}" version="1.1" width="{width}"'
+    ' xmlns="http://www.w3.org/2000/svg"'
+    ' xmlns:ev="http://www.w3.org/2001/xml-events"'
+    ' xmlns:xlink="http://www.w3.org/1999/xlink"><defs />'
+)
+
+
+def _write_svg_direct(filename, width, height, fragments):
+    """
+    Write a SVG document made of raw XML fragments to filename, without
+    building the svgwrite element tree (same output as
+    _my_svgwrite_drawing_wrapper)
+
+    Keyword arguments:
+    filename -- string, filename to save to OR file object
+    width -- document width
+    height -- document height
+    fragments -- list of raw XML strings or svgwrite elements
+    """
+    header = _SVG_HEADER.format(width=_fmt(width), height=_fmt(height))
+    svg_text = "".join(
+        [header] + [_svg_tostring(fragment) for fragment in fragments] + ["</svg>"]
+    )
+    if hasattr(filename, "write"):
+        filename.write(svg_text)
+    else:
+        with io.open(str(filename), mode="wb", buffering=1 << 20) as fileobj:
+            fileobj.write(svg_text.encode("utf-8"))
 
 
 ############################################################################
@@ -107,6 +352,7 @@ class LoggingHelper:
 
     def __init__(self):
         self._logger = None
+        self._debug_enabled = False
 
     def initialize(self, level=logging.INFO, stream=sys.stdout):
         """Initialize"""
@@ -120,6 +366,11 @@ class LoggingHelper:
         fh.setFormatter(formatter)
         self._logger.addHandler(fh)
         self._logger = logging.getLogger("Gantt")
+        self._debug_enabled = self._logger.isEnabledFor(logging.DEBUG)
+
+    def is_initialized(self):
+        """Return True if a logger has been set up"""
+        return self._logger is not None
 
     def close(self):
         """Close"""
@@ -130,10 +381,10 @@ class LoggingHelper:
                 handler.close()
                 self._logger.removeHandler(handler)
 
-    def debug(self, message):
-        """Debug"""
-        if self._logger is not None:
-            self._logger.debug(message)
+    def debug(self, message, *args):
+        """Debug (message is %-formatted with args only if debug is enabled)"""
+        if self._debug_enabled:
+            self._logger.debug(message, *args)
 
     def warning(self, message):
         """Warning"""
@@ -163,8 +414,34 @@ DRAW_WITH_QUATERLY_SCALE = "q"
 
 ############################################################################
 
+# Incremented whenever computed task days may change (see Resource._tasks_by_day)
+_DAYS_VERSION = 0
+# Incremented whenever days off or vacations change (see _WorkCalendar)
+_CALENDAR_VERSION = 0
+
+
+def _days_changed():
+    """
+    Tell caches depending on task days that they are outdated
+    """
+    global _DAYS_VERSION
+    _DAYS_VERSION += 1
+
+
+def _calendar_changed():
+    """
+    Tell work calendars that days off or vacations changed, and so task days
+    """
+    global _CALENDAR_VERSION
+    _CALENDAR_VERSION += 1
+    _days_changed()
+
+
 # Unworked days (0: Monday ... 6: Sunday)
 NOT_WORKED_DAYS = [5, 6]
+# same days, as a set and as a bit mask (bit n set for day n)
+_NOT_WORKED_SET = frozenset(NOT_WORKED_DAYS)
+_NOT_WORKED_MASK = sum(1 << d for d in _NOT_WORKED_SET)
 
 
 def define_not_worked_days(list_of_days):
@@ -174,8 +451,11 @@ def define_not_worked_days(list_of_days):
     Keyword arguments:
     list_of_days -- list of integer (0: Monday ... 6: Sunday) - default [5, 6]
     """
-    global NOT_WORKED_DAYS
+    global NOT_WORKED_DAYS, _NOT_WORKED_SET, _NOT_WORKED_MASK
     NOT_WORKED_DAYS = list_of_days
+    _NOT_WORKED_SET = frozenset(list_of_days)
+    _NOT_WORKED_MASK = sum(1 << d for d in _NOT_WORKED_SET)
+    _calendar_changed()
     return
 
 
@@ -187,6 +467,37 @@ def _not_worked_days():
     return NOT_WORKED_DAYS
 
 
+def _worked_days(first_day, last_day):
+    """
+    Yields worked days (datetime.date) from first_day to last_day (included),
+    iterating on day ordinals and converting only the days which are kept
+
+    Keyword arguments:
+    first_day -- datetime.date
+    last_day -- datetime.date
+    """
+    mask = _NOT_WORKED_MASK
+    for ordinal in range(first_day.toordinal(), last_day.toordinal() + 1):
+        # ordinal 1 (0001-01-01) is a Monday
+        if not (mask >> ((ordinal - 1) % 7)) & 1:
+            yield datetime.date.fromordinal(ordinal)
+
+
+def _scan_task_days(spans):
+    """
+    Yields (index, ordinal) for each worked day of each span, working on
+    day ordinals only so that dates can be built once per distinct day
+
+    Keyword arguments:
+    spans -- list of (first day ordinal, last day ordinal) tuples
+    """
+    mask = _NOT_WORKED_MASK
+    for index, (first, last) in enumerate(spans):
+        for ordinal in range(first, last + 1):
+            if not (mask >> ((ordinal - 1) % 7)) & 1:
+                yield index, ordinal
+
+
 ############################################################################
 
 FONT_ATTR = {
@@ -197,6 +508,16 @@ FONT_ATTR = {
     "font_size": 15,
 }
 
+_FontAttributes = collections.namedtuple(
+    "_FontAttributes", ("fill", "stroke", "stroke_width", "font_family")
+)
+_FONT = _FontAttributes(
+    FONT_ATTR["fill"],
+    FONT_ATTR["stroke"],
+    FONT_ATTR["stroke_width"],
+    FONT_ATTR["font_family"],
+)
+
 
 def define_font_attributes(
     fill="black", stroke="black", stroke_width=0, font_family="Verdana"
@@ -210,7 +531,7 @@ def define_font_attributes(
     stroke_width -- stroke width - default 0
     font_family -- font family - default 'Verdana'
     """
-    global FONT_ATTR
+    global FONT_ATTR, _FONT
 
     FONT_ATTR = {
         "fill": fill,
@@ -218,6 +539,7 @@ def define_font_attributes(
         "stroke_width": stroke_width,
         "font_family": font_family,
     }
+    _FONT = _FontAttributes(fill, stroke, stroke_width, font_family)
 
     return
 
@@ -237,11 +559,60 @@ def _font_attributes():
     return FONT_ATTR
 
 
+def _font_tuple():
+    """
+    Return font attributes as a (fill, stroke, stroke_width, font_family)
+    named tuple, built once when the font is defined
+    """
+    return _FONT
+
+
+# Initials of the week days, Monday first, used in the daily calendar
+_WEEKDAY_INITIALS = "LMMJVSD"
+
+
+# Marker drawn at the end of dependency lines, defined once per drawing
+_DEPENDENCY_MARKER_ID = "dependency_marker"
+_DEPENDENCY_MARKER_IRI = "url(#{0})".format(_DEPENDENCY_MARKER_ID)
+
+
+def _dependency_marker():
+    """
+    Returns the svgwrite Marker referenced by _DEPENDENCY_MARKER_IRI
+    """
+    marker = svgwrite.container.Marker(
+        insert=(5, 5), size=(10, 10), id=_DEPENDENCY_MARKER_ID
+    )
+    marker.add(
+        svgwrite.shapes.Circle((5, 5), r=5, fill="#000000", opacity=0.5, stroke_width=0)
+    )
+    return marker
+
+
+def _dependency_path(points):
+    """
+    Returns raw SVG path of a dependency line going through points and
+    ending with the dependency marker
+
+    Keyword arguments:
+    points -- list of (x, y) tuples, in mm
+    """
+    d = " L".join("{0},{1}".format(_fmt(x * mm), _fmt(y * mm)) for x, y in points)
+    return _svg_element(
+        "path",
+        d="M" + d,
+        fill="none",
+        stroke="black",
+        stroke_dasharray="5,3",
+        marker_end=_DEPENDENCY_MARKER_IRI,
+    )
+
+
 ############################################################################
 
 
-# list of vacations as datetime (non worked days)
-VACATIONS = []
+# set of vacations as datetime (non worked days)
+VACATIONS = set()
 
 
 ############################################################################
@@ -258,30 +629,287 @@ def add_vacations(start_date, end_date=None):
     end_date -- datetime.date end of vacation of vacation
     """
     LOG.debug(
-        "** add_vacations {0}".format({"start_date": start_date, "end_date": end_date})
+        "** add_vacations {'start_date': %r, 'end_date': %r}", start_date, end_date
     )
 
     global VACATIONS
 
     if end_date is None:
-        if start_date not in VACATIONS:
-            VACATIONS.append(start_date)
+        VACATIONS.add(start_date)
     else:
-        while start_date <= end_date:
-            if start_date not in VACATIONS:
-                VACATIONS.append(start_date)
+        VACATIONS.update(
+            map(
+                datetime.date.fromordinal,
+                range(start_date.toordinal(), end_date.toordinal() + 1),
+            )
+        )
 
-            start_date += datetime.timedelta(days=1)
+    _calendar_changed()
 
     LOG.debug(
-        "** add_vacations {0}".format(
-            {"start_date": start_date, "end_date": end_date, "vac": VACATIONS}
-        )
+        "** add_vacations {'start_date': %r, 'end_date': %r, 'vac': %r}",
+        start_date,
+        end_date,
+        VACATIONS,
     )
 
     return
 
 
+def clear_vacations():
+    """
+    Remove all global vacations
+    """
+    global VACATIONS
+    VACATIONS = set()
+    _calendar_changed()
+    return
+
+
+def _days_off_bits(first, count):
+    """
+    Returns the bits of weekly days off (see NOT_WORKED_DAYS) for count days
+    from ordinal first, bit 0 being day first
+
+    Keyword arguments:
+    first -- int, day ordinal
+    count -- int, number of days
+    """
+    # ordinal 1 is a Monday, the weekly pattern is repeated by doubling
+    bits = 0
+    for offset in range(7):
+        if (_NOT_WORKED_MASK >> ((first + offset - 1) % 7)) & 1:
+            bits |= 1 << offset
+    width = 7
+    while width < count:
+        bits |= bits << width
+        width *= 2
+    return bits & ((1 << count) - 1)
+
+
+def _bit_indices(bits):
+    """
+    Yields the indices of the bits set in bits, in ascending order
+
+    Keyword arguments:
+    bits -- int, non negative
+    """
+    while bits:
+        low = bits & -bits
+        bits ^= low
+        yield low.bit_length() - 1
+
+
+class _WorkCalendar(object):
+    """
+    Non worked days of a resource (or of everybody), kept as a bitset over
+    day ordinals: bit n is set if day (first + n) is not worked. The covered
+    range grows on demand and is rebuilt when vacations or days off change.
+    """
+
+    __slots__ = ("resource", "first", "count", "bits", "version", "_next_free")
+
+    # number of days added on each side of a day missing from the bitset
+    SPAN = 64
+
+    def __init__(self, resource=None):
+        """
+        Keyword arguments:
+        resource -- Resource or GroupOfResources whose availability is taken
+                    into account, None for global days off only
+        """
+        self.resource = resource
+        self.first = 0
+        self.count = 0
+        self.bits = 0
+        self.version = None
+        self._next_free = None
+        return
+
+    def _day_bits(self, first, last):
+        """
+        Returns the bits of non worked days from ordinal first to last
+        (excluded), built from days off and vacation ranges with integer
+        operations instead of testing each day
+        """
+        count = last - first
+        bits = _days_off_bits(first, count)
+        for day in VACATIONS:
+            offset = day.toordinal() - first
+            if 0 <= offset < count:
+                bits |= 1 << offset
+
+        resource = self.resource
+        if isinstance(resource, Resource):
+            ranges = list(resource.vacations)
+            for g in resource.member_of_groups:
+                ranges.extend(g.vacations)
+            for dfrom, dto in ranges:
+                low = max(dfrom.toordinal(), first) - first
+                high = min(dto.toordinal(), last - 1) - first
+                if low <= high:
+                    bits |= ((1 << (high - low + 1)) - 1) << low
+        elif resource is not None:
+            fromordinal = datetime.date.fromordinal
+            for offset in range(count):
+                if not (bits >> offset) & 1 and not resource.is_available(
+                    fromordinal(first + offset)
+                ):
+                    bits |= 1 << offset
+        return bits
+
+    def _cover(self, ordinal):
+        """
+        Extend (or rebuild if outdated) the bitset so that it includes the
+        given day ordinal. Extensions at least double the covered range.
+        """
+        if self.version != _CALENDAR_VERSION or not self.count:
+            self.first = ordinal - self.SPAN
+            self.count = 2 * self.SPAN
+            self.bits = self._day_bits(self.first, self.first + self.count)
+            self.version = _CALENDAR_VERSION
+            self._next_free = None
+            return
+        margin = max(self.SPAN, self.count)
+        if ordinal < self.first:
+            first = min(ordinal, self.first - margin)
+            shift = self.first - first
+            self.bits = (self.bits << shift) | self._day_bits(first, self.first)
+            self.first = first
+            self.count += shift
+        else:
+            end = self.first + self.count
+            last = max(ordinal + 1, end + margin)
+            self.bits |= self._day_bits(end, last) << self.count
+            self.count = last - self.first
+        self._next_free = None
+        return
+
+    def _next_free_table(self):
+        """
+        Returns the list giving for each offset of the bitset the offset of
+        the first worked day from there (self.count if there is none)
+        """
+        if self._next_free is None:
+            flags = format(self.bits, "b").zfill(self.count)[::-1]
+            table = [0] * self.count
+            following = self.count
+            for offset in range(self.count - 1, -1, -1):
+                if flags[offset] == "0":
+                    following = offset
+                table[offset] = following
+            self._next_free = table
+        return self._next_free
+
+    def is_non_working(self, day):
+        """
+        Returns True if day is not worked
+
+        Keyword arguments:
+        day -- datetime.date
+        """
+        offset = day.toordinal() - self.first
+        if self.version != _CALENDAR_VERSION or not 0 <= offset < self.count:
+            self._cover(day.toordinal())
+            offset = day.toordinal() - self.first
+        return (self.bits >> offset) & 1 == 1
+
+    def next_working_day(self, day):
+        """
+        Returns the first worked day from day (included)
+
+        Keyword arguments:
+        day -- datetime.date
+        """
+        ordinal = day.toordinal()
+        while True:
+            offset = ordinal - self.first
+            if self.version != _CALENDAR_VERSION or not 0 <= offset < self.count:
+                self._cover(ordinal)
+                offset = ordinal - self.first
+            offset = self._next_free_table()[offset]
+            if offset < self.count:
+                if offset + self.first == day.toordinal():
+                    return day
+                return datetime.date.fromordinal(offset + self.first)
+            # every day up to the end of the bitset is off, look further
+            ordinal = self.first + self.count
+
+    def bits_between(self, first, last):
+        """
+        Returns the bits of non worked days from ordinal first to last
+        (included), bit 0 being day first
+
+        Keyword arguments:
+        first -- int, day ordinal
+        last -- int, day ordinal
+        """
+        for ordinal in (first, last):
+            if (
+                self.version != _CALENDAR_VERSION
+                or not 0 <= ordinal - self.first < self.count
+            ):
+                self._cover(ordinal)
+        return (self.bits >> (first - self.first)) & ((1 << (last - first + 1)) - 1)
+
+    def nth_working_day(self, day, nth):
+        """
+        Returns the nth worked day counted from day (included), or the first
+        worked day from day if nth < 1
+
+        Keyword arguments:
+        day -- datetime.date
+        nth -- int
+        """
+        ordinal = day.toordinal()
+        nth = max(nth, 1)
+        while True:
+            offset = ordinal - self.first
+            if self.version != _CALENDAR_VERSION or not 0 <= offset < self.count:
+                self._cover(ordinal)
+                offset = ordinal - self.first
+            width = self.count - offset
+            free = ~(self.bits >> offset) & ((1 << width) - 1)
+            nb_free = bin(free).count("1")
+            if nb_free >= nth:
+                # drop the nth - 1 lowest worked days
+                for _ in range(nth - 1):
+                    free &= free - 1
+                return datetime.date.fromordinal(
+                    ordinal + (free & -free).bit_length() - 1
+                )
+            nth -= nb_free
+            ordinal = self.first + self.count
+
+    def nth_working_day_before(self, day, nth):
+        """
+        Returns the nth worked day counted backwards from day (included)
+
+        Keyword arguments:
+        day -- datetime.date
+        nth -- int, at least 1
+        """
+        ordinal = day.toordinal()
+        while True:
+            offset = ordinal - self.first
+            if self.version != _CALENDAR_VERSION or not 0 <= offset < self.count:
+                self._cover(ordinal)
+                offset = ordinal - self.first
+            width = offset + 1
+            free = ~self.bits & ((1 << width) - 1)
+            nb_free = bin(free).count("1")
+            if nb_free >= nth:
+                # drop the nth - 1 highest worked days
+                for _ in range(nth - 1):
+                    free ^= 1 << (free.bit_length() - 1)
+                return datetime.date.fromordinal(self.first + free.bit_length() - 1)
+            nth -= nb_free
+            ordinal = self.first - 1
+
+
+_GLOBAL_CALENDAR = _WorkCalendar()
+
+
 ############################################################################
 
 
@@ -317,12 +945,59 @@ def _flatten(l, ltypes=(list, tuple)):
     return ltype(l)
 
 
+def _merge_vacations(vacations, dfrom, dto):
+    """
+    Returns vacations ranges with [dfrom, dto] added, as a sorted list of non
+    overlapping (dfrom, dto) tuples, and the list of their first days
+
+    Keyword arguments:
+    vacations -- sorted list of non overlapping (dfrom, dto) tuples
+    dfrom -- datetime.date begining of vacation
+    dto -- datetime.date end of vacation
+    """
+    merged = []
+    for first, last in sorted(vacations + [(dfrom, dto)]):
+        if last < first:
+            continue
+        if merged and first <= merged[-1][1] + _ONE_DAY:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged, [first for first, _ in merged]
+
+
+def _in_vacations(vacations, vacation_starts, date):
+    """
+    Returns True if date is inside one of the vacations ranges
+
+    Keyword arguments:
+    vacations -- sorted list of non overlapping (dfrom, dto) tuples
+    vacation_starts -- list of first days of vacations
+    date -- datetime.date day to look for
+    """
+    idx = bisect.bisect_right(vacation_starts, date) - 1
+    return idx >= 0 and vacations[idx][1] >= date
+
+
 ############################################################################
 class GroupOfResources(object):
     """
     Class for grouping resources
     """
 
+    __slots__ = (
+        "name",
+        "fullname",
+        "vacations",
+        "_vacation_starts",
+        "resources",
+        "_resource_set",
+        "tasks",
+        "_task_set",
+        "_calendar",
+    )
+
     def __init__(self, name, fullname=None):
         """
         Init a group of resource resource
@@ -331,17 +1006,21 @@ class GroupOfResources(object):
         name -- name given to the resource (id)
         fullname -- long name given to the resource
         """
-        LOG.debug("** GroupOfResources::__init__ {0}".format({"name": name}))
+        LOG.debug("** GroupOfResources::__init__ {'name': %r}", name)
         self.name = name
         self.vacations = []
+        self._vacation_starts = []
         if fullname is not None:
             self.fullname = fullname
         else:
             self.fullname = name
 
         self.resources = []
+        self._resource_set = set()
 
         self.tasks = []
+        self._task_set = set()
+        self._calendar = None
         return
 
     def add_resource(self, resource):
@@ -351,7 +1030,8 @@ class GroupOfResources(object):
         Keyword arguments:
         resource -- Resource object
         """
-        if resource not in self.resources:
+        if resource not in self._resource_set:
+            self._resource_set.add(resource)
             self.resources.append(resource)
             resource.add_group(self)
         return
@@ -366,23 +1046,34 @@ class GroupOfResources(object):
         dto -- datetime.date end of vacation of vacation
         """
         LOG.debug(
-            "** Resource::add_vacations {0}".format(
-                {"name": self.name, "dfrom": dfrom, "dto": dto}
-            )
+            "** Resource::add_vacations {'name': %r, 'dfrom': %r, 'dto': %r}",
+            self.name,
+            dfrom,
+            dto,
         )
         if dto is None:
-            self.vacations.append((dfrom, dfrom))
-        else:
-            self.vacations.append((dfrom, dto))
+            dto = dfrom
+        self.vacations, self._vacation_starts = _merge_vacations(
+            self.vacations, dfrom, dto
+        )
+        _calendar_changed()
         return
 
     def nb_elements(self):
         """
         Returns the number of resources
         """
-        LOG.debug("** GroupOfResources::nb_elements ({0})".format({"name": self.name}))
+        LOG.debug("** GroupOfResources::nb_elements ({'name': %r})", self.name)
         return len(self.resources)
 
+    def _work_calendar(self):
+        """
+        Returns the _WorkCalendar of the group
+        """
+        if self._calendar is None:
+            self._calendar = _WorkCalendar(self)
+        return self._calendar
+
     def is_available(self, date):
         """
         Returns True if any resource is available at given date, False if not.
@@ -394,37 +1085,36 @@ class GroupOfResources(object):
         # Global VACATIONS
         if date in VACATIONS:
             LOG.debug(
-                "** GroupOfResources::is_available {0} : False (global vacation)".format(
-                    {"name": self.name, "date": date}
-                )
+                "** GroupOfResources::is_available {'name': %r, 'date': %r} : False (global vacation)",
+                self.name,
+                date,
             )
             return False
 
         # Group vacations
-        for h in self.vacations:
-            dfrom, dto = h
-            if date >= dfrom and date <= dto:
-                LOG.debug(
-                    "** GroupOfResources::is_available {0} : False (group vacation)".format(
-                        {"name": self.name, "date": date}
-                    )
-                )
-                return False
+        if _in_vacations(self.vacations, self._vacation_starts, date):
+            LOG.debug(
+                "** GroupOfResources::is_available {'name': %r, 'date': %r} : False (group vacation)",
+                self.name,
+                date,
+            )
+            return False
 
-        # Test if at least one resource is avalaible
-        for r in self.resources:
-            if r.is_available(date):
-                LOG.debug(
-                    "** GroupOfResources::is_available {0} : True {1}".format(
-                        {"name": self.name, "date": date}, r.name
-                    )
-                )
-                return True
+        # Test if at least one resource is avalaible (stops on first one)
+        available = next((r for r in self.resources if r.is_available(date)), None)
+        if available is not None:
+            LOG.debug(
+                "** GroupOfResources::is_available {'name': %r, 'date': %r} : True %s",
+                self.name,
+                date,
+                available.name,
+            )
+            return True
 
         LOG.debug(
-            "** GroupOfResources::is_available {0} : False".format(
-                {"name": self.name, "date": date}
-            )
+            "** GroupOfResources::is_available {'name': %r, 'date': %r} : False",
+            self.name,
+            date,
         )
         return False
 
@@ -435,14 +1125,15 @@ class GroupOfResources(object):
         Keyword arguments:
         task -- Task object
         """
-        if task not in self.tasks:
+        if task not in self._task_set:
+            self._task_set.add(task)
             self.tasks.append(task)
         return
 
     def search_for_task_conflicts(self, all_tasks=False):
         """
-        Returns a dictionnary of all days (datetime.date) containing for each
-        overcharged day the list of task for this day.
+        Returns a dictionnary of all days (datetime.date), in ascending order,
+        containing for each overcharged day the list of task for this day.
 
         It examines all resources member and group tasks.
 
@@ -450,42 +1141,29 @@ class GroupOfResources(object):
         all_tasks -- if True return all tasks for all days, not just overcharged days
         """
         # Get for each resource
-        affected_days = {}
+        affected_days = collections.defaultdict(list)
         for r in self.resources:
             ad = r.search_for_task_conflicts(all_tasks=True)
             for d in ad:
-                try:
-                    affected_days[d].append(ad[d])
-                except KeyError:
-                    affected_days[d] = [ad[d]]
+                affected_days[d].extend(ad[d])
 
         # inspect project
         for t in self.tasks:
-            cday = t.start_date()
-            while cday <= t.end_date():
-                if cday.weekday() not in _not_worked_days():
-                    try:
-                        affected_days[cday].append(t.fullname)
-                    except KeyError:
-                        affected_days[cday] = [t.fullname]
-
-                cday += datetime.timedelta(days=1)
+            for cday in _worked_days(t.start_date(), t.end_date()):
+                affected_days[cday].append(t.fullname)
 
         # compile everything
+        if all_tasks:
+            return {d: affected_days[d] for d in sorted(affected_days)}
+
+        nb_elements = self.nb_elements()
         overcharged_days = {}
-        ke = list(affected_days.keys())
-        ke.sort()
-        for d in ke:
-            affected_days[d] = _flatten(affected_days[d])
-            if all_tasks:
-                overcharged_days[d] = affected_days[d]
-
-            elif len(affected_days[d]) > self.nb_elements():
-                overcharged_days[d] = affected_days[d]
+        for d in sorted(affected_days):
+            tasks = affected_days[d]
+            if len(tasks) > nb_elements:
+                overcharged_days[d] = tasks
                 LOG.warning(
-                    '** GroupOfResources "{2}" has more than {3} tasks on day {0} / {1}'.format(
-                        d, affected_days[d], self.name, self.nb_elements()
-                    )
+                    f'** GroupOfResources "{self.name}" has more than {nb_elements} tasks on day {d} / {tasks}'
                 )
 
         return overcharged_days
@@ -515,6 +1193,21 @@ class Resource(object):
     Class for handling resources assigned to tasks
     """
 
+    __slots__ = (
+        "name",
+        "fullname",
+        "color",
+        "vacations",
+        "_vacation_starts",
+        "member_of_groups",
+        "tasks",
+        "_task_set",
+        "_cache_tasks_by_day",
+        "_cache_days_version",
+        "_cache_conflicts",
+        "_calendar",
+    )
+
     def __init__(self, name, fullname=None, color=None):
         """
         Init a resource
@@ -524,7 +1217,7 @@ class Resource(object):
         fullname -- long name given to the resource
         color -- string, html color, default None
         """
-        LOG.debug("** Resource::__init__ {0}".format({"name": name}))
+        LOG.debug("** Resource::__init__ {'name': %r}", name)
         self.name = name
         if fullname is not None:
             self.fullname = fullname
@@ -533,9 +1226,15 @@ class Resource(object):
         self.color = color
 
         self.vacations = []
+        self._vacation_starts = []
         self.member_of_groups = []
 
         self.tasks = []
+        self._task_set = set()
+        self._cache_tasks_by_day = None
+        self._cache_days_version = None
+        self._cache_conflicts = None
+        self._calendar = None
         return
 
     def add_vacations(self, dfrom, dto=None):
@@ -548,23 +1247,34 @@ class Resource(object):
         dto -- datetime.date end of vacation of vacation
         """
         LOG.debug(
-            "** Resource::add_vacations {0}".format(
-                {"name": self.name, "dfrom": dfrom, "dto": dto}
-            )
+            "** Resource::add_vacations {'name': %r, 'dfrom': %r, 'dto': %r}",
+            self.name,
+            dfrom,
+            dto,
         )
         if dto is None:
-            self.vacations.append((dfrom, dfrom))
-        else:
-            self.vacations.append((dfrom, dto))
+            dto = dfrom
+        self.vacations, self._vacation_starts = _merge_vacations(
+            self.vacations, dfrom, dto
+        )
+        _calendar_changed()
         return
 
     def nb_elements(self):
         """
         Returns the number of resources, 1 here
         """
-        LOG.debug("** Resource::nb_elements ({0})".format({"name": self.name}))
+        LOG.debug("** Resource::nb_elements ({'name': %r})", self.name)
         return 1
 
+    def _work_calendar(self):
+        """
+        Returns the _WorkCalendar of the resource
+        """
+        if self._calendar is None:
+            self._calendar = _WorkCalendar(self)
+        return self._calendar
+
     def is_available(self, date):
         """
         Returns True if the resource is available at given date, False if not.
@@ -576,38 +1286,33 @@ class Resource(object):
         # global VACATIONS
         if date in VACATIONS:
             LOG.debug(
-                "** Resource::is_available {0} : False (global vacation)".format(
-                    {"name": self.name, "date": date}
-                )
+                "** Resource::is_available {'name': %r, 'date': %r} : False (global vacation)",
+                self.name,
+                date,
             )
             return False
 
         # GroupOfResources vacation
         for g in self.member_of_groups:
-            for h in g.vacations:
-                dfrom, dto = h
-                if date >= dfrom and date <= dto:
-                    LOG.debug(
-                        "** Resource::is_available {0} : False (Group {1})".format(
-                            {"name": self.name, "date": date}, g.name
-                        )
-                    )
-                    return False
-
-        # Resource vacation
-        for h in self.vacations:
-            dfrom, dto = h
-            if date >= dfrom and date <= dto:
+            if _in_vacations(g.vacations, g._vacation_starts, date):
                 LOG.debug(
-                    "** Resource::is_available {0} : False".format(
-                        {"name": self.name, "date": date}
-                    )
+                    "** Resource::is_available {'name': %r, 'date': %r} : False (Group %s)",
+                    self.name,
+                    date,
+                    g.name,
                 )
                 return False
-        LOG.debug(
-            "** Resource::is_available {0} : True".format(
-                {"name": self.name, "date": date}
+
+        # Resource vacation
+        if _in_vacations(self.vacations, self._vacation_starts, date):
+            LOG.debug(
+                "** Resource::is_available {'name': %r, 'date': %r} : False",
+                self.name,
+                date,
             )
+            return False
+        LOG.debug(
+            "** Resource::is_available {'name': %r, 'date': %r} : True", self.name, date
         )
         return True
 
@@ -620,6 +1325,7 @@ class Resource(object):
         """
         if groupofresources not in self.member_of_groups:
             self.member_of_groups.append(groupofresources)
+            _calendar_changed()
         return
 
     def add_task(self, task):
@@ -629,47 +1335,71 @@ class Resource(object):
         Keyword arguments:
         task -- Task object
         """
-        if task not in self.tasks:
+        if task not in self._task_set:
+            self._task_set.add(task)
             self.tasks.append(task)
+            self._cache_tasks_by_day = None
         return
 
+    def _tasks_by_day(self):
+        """
+        Returns a dictionnary of all worked days (datetime.date), in ascending
+        order, of the resource tasks containing the list of task names for this
+        day. It is computed once and kept until tasks or task days change: it
+        is shared, not to be modified.
+        """
+        if (
+            self._cache_tasks_by_day is None
+            or self._cache_days_version != _DAYS_VERSION
+        ):
+            tasks = self.tasks
+            spans = [
+                (t.start_date().toordinal(), t.end_date().toordinal()) for t in tasks
+            ]
+            affected_days = collections.defaultdict(list)
+            for index, ordinal in _scan_task_days(spans):
+                affected_days[ordinal].append(tasks[index].fullname)
+            fromordinal = datetime.date.fromordinal
+            self._cache_tasks_by_day = {
+                fromordinal(ordinal): affected_days[ordinal]
+                for ordinal in sorted(affected_days)
+            }
+            self._cache_days_version = _DAYS_VERSION
+        return self._cache_tasks_by_day
+
     def search_for_task_conflicts(self, all_tasks=False):
         """
-        Returns a dictionnary of all days (datetime.date) containing for each
-        overcharged day the list of task for this day.
+        Returns a dictionnary of all days (datetime.date), in ascending order,
+        containing for each overcharged day the list of task for this day.
+        Overcharged days are compiled once until tasks or task days change, and
+        logged on each call.
 
         Keyword arguments:
         all_tasks -- if True return all tasks for all days, not just overcharged days
         """
-        affected_days = {}
-        for t in self.tasks:
-            cday = t.start_date()
-            while cday <= t.end_date():
-                if cday.weekday() not in _not_worked_days():
-                    try:
-                        affected_days[cday].append(t.fullname)
-                    except KeyError:
-                        affected_days[cday] = [t.fullname]
+        affected_days = self._tasks_by_day()
 
-                cday += datetime.timedelta(days=1)
-
-        # return all
+        # return all, as copies: cached lists are not to be modified
         if all_tasks:
-            return affected_days
+            return {d: list(tasks) for d, tasks in affected_days.items()}
+
+        # compile only overcharge, kept as long as the worked days they were
+        # compiled from are still valid
+        if (
+            self._cache_conflicts is None
+            or self._cache_conflicts[0] is not affected_days
+        ):
+            overcharged_days = {
+                d: tasks for d, tasks in affected_days.items() if len(tasks) > 1
+            }
+            self._cache_conflicts = (affected_days, overcharged_days)
 
-        # compile only overcharge
         overcharged_days = {}
-        ke = list(affected_days.keys())
-        ke.sort()
-        for d in ke:
-            if len(affected_days[d]) > 1:
-                overcharged_days[d] = affected_days[d]
-                LOG.warning(
-                    '** Resource "{2}" has more than one task on day {0} / {1}'.format(
-                        d, affected_days[d], self.name
-                    )
-                )
-
+        for d, tasks in self._cache_conflicts[1].items():
+            overcharged_days[d] = list(tasks)
+            LOG.warning(
+                f'** Resource "{self.name}" has more than one task on day {d} / {tasks}'
+            )
         return overcharged_days
 
     def is_vacant(self, from_date, to_date):
@@ -681,53 +1411,98 @@ class Resource(object):
         from_date -- first day
         to_date --  last day
         """
-        non_vacant_days = self.search_for_task_conflicts(all_tasks=True)
-        cday = from_date
-        while cday <= to_date:
-            if cday.weekday() not in _not_worked_days():
-                if not self.is_available(cday):
-                    LOG.debug(
-                        '** Ressource "{0}" is not available on day {1} (vacation)'.format(
-                            self.name, cday
-                        )
-                    )
-                    return []
-                if cday in non_vacant_days:
-                    LOG.debug(
-                        '** Ressource "{0}" is not available on day {1} (other task : {2})'.format(
-                            self.name, cday, non_vacant_days[cday]
-                        )
-                    )
-                    return []
+        non_vacant_days = self._tasks_by_day()
+        for cday in _worked_days(from_date, to_date):
+            if not self.is_available(cday):
+                LOG.debug(
+                    '** Ressource "%s" is not available on day %s (vacation)',
+                    self.name,
+                    cday,
+                )
+                return []
+            if cday in non_vacant_days:
+                LOG.debug(
+                    '** Ressource "%s" is not available on day %s (other task : %s)',
+                    self.name,
+                    cday,
+                    non_vacant_days[cday],
+                )
+                return []
 
-            cday += datetime.timedelta(days=1)
         return [self.name]
 
 
 ############################################################################
 
 
+def _add_months(day, months):
+    """
+    Returns day shifted by a number of months, the day of month being clipped
+    to the end of the target month (as relativedelta(months=months) does)
+
+    Keyword arguments:
+    day -- datetime.date
+    months -- int, number of months to add
+    """
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    month += 1
+    return datetime.date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _months_between(start_date, end_date):
+    """
+    Returns the number of whole months from start_date to end_date, as the
+    months + years * 12 of relativedelta(end_date, start_date)
+
+    Keyword arguments:
+    start_date -- datetime.date
+    end_date -- datetime.date
+    """
+    months = (end_date.year - start_date.year) * 12 + (
+        end_date.month - start_date.month
+    )
+    if end_date >= start_date:
+        if _add_months(start_date, months) > end_date:
+            months -= 1
+    elif _add_months(start_date, months) < end_date:
+        months += 1
+    return months
+
+
+def _next_iso_week(monday, previous_week):
+    """
+    Returns the ISO week number of a Monday from the number of the previous
+    Monday's week, without calling isocalendar() on each week
+
+    Keyword arguments:
+    monday -- datetime.date, a Monday
+    previous_week -- int, ISO week number of the previous Monday, None if unknown
+    """
+    if previous_week is None:
+        return monday.isocalendar()[1]
+    # week 1 starts on the Monday between Dec 29 and Jan 4
+    if (monday.month == 1 and monday.day <= 4) or (
+        monday.month == 12 and monday.day >= 29
+    ):
+        return 1
+    return previous_week + 1
+
+
 def _get_maxx(scale, start_date, end_date):
     if scale == DRAW_WITH_DAILY_SCALE:
         # how many dayss do we need to draw ?
-        maxx = (end_date - start_date).days
+        maxx = end_date.toordinal() - start_date.toordinal()
     elif scale == DRAW_WITH_WEEKLY_SCALE:
         # how many weeks do we need to draw ?
-        maxx = 0
-        guess = start_date
-        while guess.weekday() != 0:
-            guess = guess + relativedelta(days=-1)
-        while end_date.weekday() != 6:
-            end_date = end_date + relativedelta(days=+1)
-        while guess <= end_date:
-            maxx += 1
-            guess = guess + relativedelta(weeks=+1)
-        maxx -= 1
+        first_monday = start_date.toordinal() - start_date.weekday()
+        last_sunday = end_date.toordinal() + 6 - end_date.weekday()
+        maxx = max((last_sunday - first_monday) // 7, -1)
     elif scale == DRAW_WITH_MONTHLY_SCALE:
         # how many months do we need to draw ?
-        delta = relativedelta(end_date + datetime.timedelta(days=1), start_date)
-        maxx = delta.months + delta.years * 12 - 1
-        if delta.days > 0:
+        day_after = end_date + _ONE_DAY
+        months = _months_between(start_date, day_after)
+        maxx = months - 1
+        if day_after > start_date and _add_months(start_date, months) != day_after:
             maxx += 1
     elif scale == DRAW_WITH_QUATERLY_SCALE:
         # how many quarter do we need to draw ?
@@ -743,37 +1518,72 @@ def _time_diff(scale, start_date, end_date, duration, milestone=False) -> int:
     the instant of start of the task which is the time difference between start_date
     (the beginning of the project) and end_date (the beginning of the task)"""
     if scale == DRAW_WITH_DAILY_SCALE:
-        return (end_date - start_date).days
+        return end_date.toordinal() - start_date.toordinal()
     if scale == DRAW_WITH_WEEKLY_SCALE:
-        td = 0
-        guess = start_date
-        while guess.weekday() != 0:
-            guess = guess + relativedelta(days=-1)
+        first_monday = start_date.toordinal() - start_date.weekday()
         if duration:
-            while end_date.weekday() != 0:
-                end_date = end_date + relativedelta(days=-1)
+            # back to monday
+            end_ordinal = end_date.toordinal() - end_date.weekday()
         else:
-            while end_date.weekday() != 6:
-                end_date = end_date + relativedelta(days=+1)
-        while guess + relativedelta(days=+6) < end_date:
-            td += 1
-            guess += relativedelta(weeks=+1)
+            # up to sunday
+            end_ordinal = end_date.toordinal() + 6 - end_date.weekday()
+        # number of whole weeks from first monday
+        td = max((end_ordinal - first_monday) // 7, 0)
         if milestone:
             return td - 1
         return td
     if scale == DRAW_WITH_MONTHLY_SCALE:
         if not duration:
             start_date = start_date.replace(day=1)
-        rdelta = relativedelta(end_date, start_date)
-        return rdelta.months + rdelta.years * 12
+        return _months_between(start_date, end_date)
     raise ValueError(f"Could not compute a time difference.")
 
 
+def _dependency_list(depends_on):
+    """
+    Returns depends_on as a new list, or None if depends_on is None
+
+    Keyword arguments:
+    depends_on -- Task, list or tuple of Task or None
+    """
+    if depends_on is None:
+        return None
+    if isinstance(depends_on, (list, tuple)):
+        return list(depends_on)
+    return [depends_on]
+
+
 class Task(object):
     """
     Class for manipulating Tasks
     """
 
+    __slots__ = (
+        "name",
+        "fullname",
+        "start",
+        "stop",
+        "duration",
+        "color",
+        "display",
+        "state",
+        "depends_on",
+        "resources",
+        "percent_done",
+        "drawn_x_begin_coord",
+        "drawn_x_end_coord",
+        "drawn_y_coord",
+        "_cache_start_date",
+        "_cache_end_date",
+        "_svg_id",
+    )
+
+    # shift applied to the end date of a dependency: a task may start on the
+    # day a milestone it depends on is reached, not on the last day of a task
+    _dep_end_delta = datetime.timedelta(0)
+    # X offset, in mm, from the drawn end of a dependency to its line start
+    _dep_line_dx = -2
+
     def __init__(
         self,
         name,
@@ -808,19 +1618,17 @@ class Task(object):
         state -- string, state of the task
         """
         LOG.debug(
-            "** Task::__init__ {0}".format(
-                {
-                    "name": name,
-                    "start": start,
-                    "stop": stop,
-                    "duration": duration,
-                    "depends_on": depends_on,
-                    "resources": resources,
-                    "percent_done": percent_done,
-                }
-            )
+            "** Task::__init__ {'name': %r, 'start': %r, 'stop': %r, 'duration': %r, 'depends_on': %r, 'resources': %r, 'percent_done': %r}",
+            name,
+            start,
+            stop,
+            duration,
+            depends_on,
+            resources,
+            percent_done,
         )
         self.name = name
+        self._svg_id = str(name).translate(_ID_TRANS)
         if fullname is not None:
             self.fullname = fullname
         else:
@@ -850,12 +1658,7 @@ class Task(object):
             # Bug ? may be defined later
             # raise ValueError('Task "{1}" must be defined by two of three limits ({0})'.format({'start':self.start, 'stop':self.stop, 'duration':self.duration}, fullname))
 
-        if type(depends_on) is type([]):
-            self.depends_on = depends_on
-        elif depends_on is not None:
-            self.depends_on = [depends_on]
-        else:
-            self.depends_on = None
+        self.depends_on = _dependency_list(depends_on)
 
         self.resources = resources
         self.percent_done = percent_done
@@ -880,19 +1683,30 @@ class Task(object):
         Keyword arguments:
         depends_on -- list of Task which are parents of this one
         """
-        if isinstance(depends_on, list):
-            if self.depends_on is None:
-                self.depends_on = depends_on
-            else:
-                self.depends_on.extend(depends_on)
-        else:
-            if self.depends_on is None:
-                self.depends_on = depends_on
-            else:
-                self.depends_on.append(depends_on)
+        if not isinstance(depends_on, (list, tuple)):
+            depends_on = [depends_on]
+        if self.depends_on is None:
+            self.depends_on = []
 
+        # skip dependencies already known (set lookup instead of list scan)
+        known = set(self.depends_on)
+        for task in depends_on:
+            if task not in known:
+                known.add(task)
+                self.depends_on.append(task)
+
+        self.invalidate_cache()
         return
 
+    def invalidate_cache(self):
+        """
+        Forget computed start and end dates, they will be computed again on
+        next call
+        """
+        self._cache_start_date = None
+        self._cache_end_date = None
+        _days_changed()
+
     def start_date(self):
         """
         Returns the first day of the task, either the one which was given at
@@ -901,15 +1715,14 @@ class Task(object):
         if self._cache_start_date is not None:
             return self._cache_start_date
 
-        LOG.debug("** Task::start_date ({0})".format(self.name))
+        LOG.debug("** Task::start_date (%s)", self.name)
         if self.start is not None:
             # start date setted, calculate begining
             if self.depends_on is None:
                 # depends on nothing... start date is start
                 # LOG.debug('*** Do not depend of other task')
                 start = self.start
-                while self.non_working_day(start):
-                    start = start + datetime.timedelta(days=1)
+                start = self._next_working_day(start)
 
                 if start > self.start:
                     LOG.warning(
@@ -924,20 +1737,15 @@ class Task(object):
                 # depends on other task, start date could vary
                 # LOG.debug('*** Do depend of other tasks')
                 start = self.start
-                while self.non_working_day(start):
-                    start = start + datetime.timedelta(days=1)
+                start = self._next_working_day(start)
 
                 prev_task_end = start
-                for t in self.depends_on:
-                    if isinstance(t, Milestone):
-                        if t.end_date() >= prev_task_end:
-                            prev_task_end = t.end_date()
-                    elif isinstance(t, Task):
-                        if t.end_date() >= prev_task_end:
-                            prev_task_end = t.end_date() + datetime.timedelta(days=1)
+                if self.depends_on:
+                    prev_task_end = max(
+                        prev_task_end, self._dependencies_end() + _ONE_DAY
+                    )
 
-                while self.non_working_day(prev_task_end):
-                    prev_task_end = prev_task_end + datetime.timedelta(days=1)
+                prev_task_end = self._next_working_day(prev_task_end)
 
                 if prev_task_end > self.start:
                     LOG.warning(
@@ -953,23 +1761,14 @@ class Task(object):
             current_day = self.start
             # check depends
             if self.depends_on is not None:
-                prev_task_end = self.depends_on[0].end_date()
-                for t in self.depends_on:
-                    if isinstance(t, Milestone):
-                        if t.end_date() > prev_task_end:
-                            prev_task_end = t.end_date() - datetime.timedelta(days=1)
-                    elif isinstance(t, Task):
-                        if t.end_date() > prev_task_end:
-                            prev_task_end = t.end_date()
-                    # if t.end_date() > prev_task_end:
-                    #     #LOG.debug('*** latest one {0} which end on {1}'.format(t.name, t.end_date()))
-                    #     prev_task_end = t.end_date()
+                prev_task_end = max(
+                    self.depends_on[0].end_date(), self._dependencies_end()
+                )
                 if prev_task_end > current_day:
                     depend_start_date = prev_task_end
                 else:
                     start = self.start
-                    while self.non_working_day(start):
-                        start = start + datetime.timedelta(days=1)
+                    start = self._next_working_day(start)
                     depend_start_date = start
 
                     if depend_start_date > current_day:
@@ -978,7 +1777,7 @@ class Task(object):
                                 self.fullname, current_day, depend_start_date
                             )
                         )
-                    self._cache_start_date = depend_start_date
+                self._cache_start_date = depend_start_date
             else:
                 # should be first day of start...
                 self._cache_start_date = current_day
@@ -990,63 +1789,35 @@ class Task(object):
             and self.depends_on is not None
             and self.stop is None
         ):  # duration and dependencies fixed
-            prev_task_end = self.depends_on[0].end_date()
-            for t in self.depends_on:
-                if isinstance(t, Milestone):
-                    if t.end_date() > prev_task_end:
-                        prev_task_end = t.end_date() - datetime.timedelta(days=1)
-                elif isinstance(t, Task):
-                    if t.end_date() > prev_task_end:
-                        prev_task_end = t.end_date()
-                # if t.end_date() > prev_task_end:
-                #     LOG.debug('*** latest one {0} which end on {1}'.format(t.name, t.end_date()))
-                #     prev_task_end = t.end_date()
+            prev_task_end = max(self.depends_on[0].end_date(), self._dependencies_end())
 
-            start = prev_task_end + datetime.timedelta(days=1)
+            start = prev_task_end + _ONE_DAY
 
-            while self.non_working_day(start):
-                start = start + datetime.timedelta(days=1)
+            start = self._next_working_day(start)
 
             # should be first day of start...
             self._cache_start_date = start
 
         elif self.start is None and self.stop is not None:  # stop and duration fixed
             # start date not setted, calculate from end_date + depends
-            current_day = self.stop
-            real_duration = 0
-            duration = self.duration
-            while duration > 0:
-                if not self.non_working_day(current_day):
-                    real_duration = real_duration + 1
-                    duration -= 1
-                else:
-                    real_duration = real_duration + 1
-
-                current_day = self.stop - datetime.timedelta(days=real_duration)
-            current_day = self.stop - datetime.timedelta(days=real_duration - 1)
+            if self.duration > 0:
+                current_day = self._work_calendar().nth_working_day_before(
+                    self.stop, self.duration
+                )
+            else:
+                current_day = self.stop + _ONE_DAY
 
             # check depends
             if self.depends_on is not None:
-                prev_task_end = self.depends_on[0].end_date()
-                for t in self.depends_on:
-                    if isinstance(t, Milestone):
-                        if t.end_date() > prev_task_end:
-                            prev_task_end = t.end_date()
-                    elif isinstance(t, Task):
-                        if t.end_date() > prev_task_end:
-                            prev_task_end = t.end_date()
-                    # if t.end_date() > prev_task_end:
-                    #     LOG.debug('*** latest one {0} which end on {1}'.format(t.name, t.end_date()))
-                    #     prev_task_end = t.end_date()
+                prev_task_end = max(t.end_date() for t in self.depends_on)
 
                 if prev_task_end > current_day:
-                    start = prev_task_end + datetime.timedelta(days=1)
+                    start = prev_task_end + _ONE_DAY
                     # return prev_task_end
                 else:
                     start = current_day
 
-                while self.non_working_day(start):
-                    start = start + datetime.timedelta(days=1)
+                start = self._next_working_day(start)
 
                 depend_start_date = start
 
@@ -1072,15 +1843,34 @@ class Task(object):
             )
         return self._cache_start_date
 
+    def _dependencies_end(self):
+        """
+        Returns the latest end date of the tasks this one depends on, each
+        one shifted by its _dep_end_delta
+        """
+        return max(t.end_date() + t._dep_end_delta for t in self.depends_on)
+
     def non_working_day(self, day):
         """
         Returns True if day is either during week-ends or global VACATIONS, extended to
         resource vacations only if task was assigne to a single resource
         """
-        result = day.weekday() in _not_worked_days() or day in VACATIONS
+        return self._work_calendar().is_non_working(day)
+
+    def _work_calendar(self):
+        """
+        Returns the _WorkCalendar used to schedule the task: the one of its
+        resource if it was assigned to a single one, the global one otherwise
+        """
         if self.resources is not None and len(self.resources) == 1:
-            result = result or not self.resources[0].is_available(day)
-        return result
+            return self.resources[0]._work_calendar()
+        return _GLOBAL_CALENDAR
+
+    def _next_working_day(self, day):
+        """
+        Returns the first working day of the task from day (included)
+        """
+        return self._work_calendar().next_working_day(day)
 
     def end_date(self):
         """
@@ -1090,31 +1880,16 @@ class Task(object):
         if self._cache_end_date is not None:
             return self._cache_end_date
 
-        LOG.debug("** Task::end_date ({0})".format(self.name))
+        LOG.debug("** Task::end_date (%s)", self.name)
 
         if (self.duration is None or self.start is None) and self.stop is not None:
-            real_end = self.stop
             # Take care of vacations
-            while self.non_working_day(real_end):
-                real_end -= datetime.timedelta(days=1)
-
-            if real_end <= self.start_date() and self.duration is not None:
-                current_day = self.start_date()
-                real_duration = 0
-                duration = self.duration
-                while duration > 1 or self.non_working_day(current_day):
-                    if not self.non_working_day(current_day):
-                        real_duration = real_duration + 1
-                        duration -= 1
-                    else:
-                        real_duration = real_duration + 1
+            real_end = self._work_calendar().nth_working_day_before(self.stop, 1)
 
-                    current_day = self.start_date() + datetime.timedelta(
-                        days=real_duration
-                    )
-
-                self._cache_end_date = self.start_date() + datetime.timedelta(
-                    days=real_duration
+            start_date = self.start_date()
+            if real_end <= start_date and self.duration is not None:
+                self._cache_end_date = self._work_calendar().nth_working_day(
+                    start_date, self.duration
                 )
                 LOG.warning(
                     '** task "{0}" will not be finished on time : end_date is changed from {1} to {2}'.format(
@@ -1134,20 +1909,8 @@ class Task(object):
             return self._cache_end_date
 
         if self.stop is None and self.duration is not None:
-            current_day = self.start_date()
-            real_duration = 0
-            duration = self.duration
-            while duration > 1 or self.non_working_day(current_day):
-                if not self.non_working_day(current_day):
-                    real_duration = real_duration + 1
-                    duration -= 1
-                else:
-                    real_duration = real_duration + 1
-
-                current_day = self.start_date() + datetime.timedelta(days=real_duration)
-
-            self._cache_end_date = self.start_date() + datetime.timedelta(
-                days=real_duration
+            self._cache_end_date = self._work_calendar().nth_working_day(
+                self.start_date(), self.duration
             )
             return self._cache_end_date
 
@@ -1181,17 +1944,15 @@ class Task(object):
         offset -- X offset from image border to start of drawing zone
         macro_mode -- boolean, not used (only in Project.svg())
         """
+        font_fill, font_stroke, font_stroke_width, font_family = _font_tuple()
         LOG.debug(
-            "** Task::svg ({0})".format(
-                {
-                    "name": self.name,
-                    "prev_y": prev_y,
-                    "start": start,
-                    "end": end,
-                    "color": color,
-                    "level": level,
-                }
-            )
+            "** Task::svg ({'name': %r, 'prev_y': %r, 'start': %r, 'end': %r, 'color': %r, 'level': %r})",
+            self.name,
+            prev_y,
+            start,
+            end,
+            color,
+            level,
         )
         if scale == DRAW_WITH_QUATERLY_SCALE:
             message = "DRAW_WITH_QUATERLY_SCALE not implemented yet"
@@ -1199,85 +1960,54 @@ class Task(object):
             raise ValueError(message)
 
         if not self.display:
-            LOG.debug("** Task::svg ({0}) display off".format({"name": self.name}))
+            LOG.debug("** Task::svg ({'name': %r}) display off", self.name)
             return (None, 0)
 
-        add_modified_begin_mark = False
-        add_modified_end_mark = False
+        sd = self.start_date()
+        ed = self.end_date()
 
         if start is None:
-            start = self.start_date()
-
-        if self.start is not None and self.start_date() != self.start:
-            add_modified_begin_mark = True
-
+            start = sd
         if end is None:
-            end = self.end_date()
+            end = ed
 
-        if self.stop is not None and self.end_date() != self.stop:
-            add_modified_end_mark = True
+        add_modified_begin_mark = self.start is not None and sd != self.start
+        add_modified_end_mark = self.stop is not None and ed != self.stop
 
         # override project color if defined
         if self.color is not None:
             color = self.color
 
-        add_begin_mark = False
-        add_end_mark = False
-
-        y = prev_y * 10
-
-        # print(self.name + ": ", end="")
-        # cas 1 -s--S==E--e-
-        if self.start_date() >= start and self.end_date() <= end:
-            # print("cas 1 -s--S==E--e-")
-            x = _time_diff(scale, start, self.start_date(), False) * 10
-            d = (_time_diff(scale, self.start_date(), self.end_date(), True) + 1) * 10
-            self.drawn_x_begin_coord = x
-            self.drawn_x_end_coord = x + d
-        # cas 5 -s--e--S==E-
-        elif self.start_date() > end:
-            # print("cas 5 -s--e--S==E-")
+        # task out of the drawn period : -s--e--S==E- or -S==E-s--e-
+        # (a task whose start is pushed after its stop by dependencies ends
+        # before it starts, it is still drawn if it spans the period)
+        if min(sd, ed) > end or max(sd, ed) < start:
             return (None, 0)
-        # cas 6 -S==E-s--e-
-        elif self.end_date() < start:
-            # print("cas 6 -S==E-s--e-")
-            return (None, 0)
-        # cas 2 -S==s==E--e-
-        elif self.start_date() < start and self.end_date() <= end:
-            # print("cas 2 -S==s==E--e-")
-            x = 0
-            d = (_time_diff(scale, start, self.end_date(), True) + 1) * 10
-            self.drawn_x_begin_coord = x
-            self.drawn_x_end_coord = x + d
-            add_begin_mark = True
-        # cas 3 -s--S==e==E-
-        elif self.start_date() >= start and self.end_date() > end:
-            # print("cas 3 -s--S==e==E-")
-            x = _time_diff(scale, start, self.start_date(), False) * 10
-            d = (_time_diff(scale, self.start_date(), end, True) + 1) * 10
-            self.drawn_x_begin_coord = x
-            self.drawn_x_end_coord = x + d
-            add_end_mark = True
-        # cas 4 -S==s==e==E-
-        elif self.start_date() < start and self.end_date() > end:
-            # print("cas 4 -S==s==e==E-")
+
+        # clip the task bar to the drawn period, marking clipped ends
+        add_begin_mark = sd < start
+        add_end_mark = ed > end
+        if add_begin_mark:
             x = 0
-            d = (_time_diff(scale, start, end, True) + 1) * 10
-            self.drawn_x_begin_coord = x
-            self.drawn_x_end_coord = x + d
-            add_end_mark = True
-            add_begin_mark = True
         else:
-            # print("else")
-            return (None, 0)
+            x = _time_diff(scale, start, sd, False) * 10
+        d = (
+            _time_diff(scale, start if add_begin_mark else sd, min(ed, end), True) + 1
+        ) * 10
+        self.drawn_x_begin_coord = x
+        self.drawn_x_end_coord = x + d
 
+        y = prev_y * 10
         self.drawn_y_coord = y
 
-        svg = svgwrite.container.Group(id=re.sub(r"[ ,'\/()]", "_", self.name))
+        svg = _raw_svg_group(id=self._svg_id)
         svg.add(
-            svgwrite.shapes.Rect(
-                insert=((x + 1 + offset) * mm, (y + 1) * mm),
-                size=((d - 2) * mm, 8 * mm),
+            _svg_element(
+                "rect",
+                x=(x + 1 + offset) * mm,
+                y=(y + 1) * mm,
+                width=(d - 2) * mm,
+                height=8 * mm,
                 fill=color,
                 stroke=color,
                 stroke_width=2,
@@ -1285,9 +2015,12 @@ class Task(object):
             )
         )
         svg.add(
-            svgwrite.shapes.Rect(
-                insert=((x + 1 + offset) * mm, (y + 6) * mm),
-                size=((d - 2) * mm, 3 * mm),
+            _svg_element(
+                "rect",
+                x=(x + 1 + offset) * mm,
+                y=(y + 6) * mm,
+                width=(d - 2) * mm,
+                height=3 * mm,
                 fill="#909090",
                 stroke=color,
                 stroke_width=1,
@@ -1297,9 +2030,12 @@ class Task(object):
 
         if add_modified_begin_mark:
             svg.add(
-                svgwrite.shapes.Rect(
-                    insert=((x + 1 + offset) * mm, (y + 1) * mm),
-                    size=(5 * mm, 4 * mm),
+                _svg_element(
+                    "rect",
+                    x=(x + 1 + offset) * mm,
+                    y=(y + 1) * mm,
+                    width=5 * mm,
+                    height=4 * mm,
                     fill="#0000FF",
                     stroke=color,
                     stroke_width=1,
@@ -1309,9 +2045,12 @@ class Task(object):
 
         if add_modified_end_mark:
             svg.add(
-                svgwrite.shapes.Rect(
-                    insert=((x + d - 7 + 1 + offset) * mm, (y + 1) * mm),
-                    size=(5 * mm, 4 * mm),
+                _svg_element(
+                    "rect",
+                    x=(x + d - 7 + 1 + offset) * mm,
+                    y=(y + 1) * mm,
+                    width=5 * mm,
+                    height=4 * mm,
                     fill="#0000FF",
                     stroke=color,
                     stroke_width=1,
@@ -1321,9 +2060,12 @@ class Task(object):
 
         if add_begin_mark:
             svg.add(
-                svgwrite.shapes.Rect(
-                    insert=((x + 1 + offset) * mm, (y + 1) * mm),
-                    size=(5 * mm, 8 * mm),
+                _svg_element(
+                    "rect",
+                    x=(x + 1 + offset) * mm,
+                    y=(y + 1) * mm,
+                    width=5 * mm,
+                    height=8 * mm,
                     fill="#000000",
                     stroke=color,
                     stroke_width=1,
@@ -1332,9 +2074,12 @@ class Task(object):
             )
         if add_end_mark:
             svg.add(
-                svgwrite.shapes.Rect(
-                    insert=((x + d - 7 + 1 + offset) * mm, (y + 1) * mm),
-                    size=(5 * mm, 8 * mm),
+                _svg_element(
+                    "rect",
+                    x=(x + d - 7 + 1 + offset) * mm,
+                    y=(y + 1) * mm,
+                    width=5 * mm,
+                    height=8 * mm,
                     fill="#000000",
                     stroke=color,
                     stroke_width=1,
@@ -1342,12 +2087,15 @@ class Task(object):
                 )
             )
 
-        if self.percent_done is not None and 100 >= self.percent_done >= 0:
-            # Bar shade
+        if self.percent_done is not None and 100 >= self.percent_done > 0:
+            # Bar shade (nothing to draw when not started)
             svg.add(
-                svgwrite.shapes.Rect(
-                    insert=((x + 1 + offset) * mm, (y + 6) * mm),
-                    size=(((d - 2) * self.percent_done / 100) * mm, 3 * mm),
+                _svg_element(
+                    "rect",
+                    x=(x + 1 + offset) * mm,
+                    y=(y + 6) * mm,
+                    width=((d - 2) * self.percent_done / 100) * mm,
+                    height=3 * mm,
                     fill="#F08000",
                     stroke=color,
                     stroke_width=1,
@@ -1361,38 +2109,44 @@ class Task(object):
             tx = 5
 
         svg.add(
-            svgwrite.text.Text(
+            _svg_element(
+                "text",
                 self.fullname,
-                insert=((tx + offset) * mm, (y + 5) * mm),
-                fill=_font_attributes()["fill"],
-                stroke=_font_attributes()["stroke"],
-                stroke_width=_font_attributes()["stroke_width"],
-                font_family=_font_attributes()["font_family"],
+                x=(tx + offset) * mm,
+                y=(y + 5) * mm,
+                fill=font_fill,
+                stroke=font_stroke,
+                stroke_width=font_stroke_width,
+                font_family=font_family,
                 font_size=15,
             )
         )
 
         if show_start_end_dates:
             svg.add(
-                svgwrite.text.Text(
-                    self.start_date().strftime("%d/%m/%y"),
-                    insert=((x + offset) * mm, (y + 9) * mm),
+                _svg_element(
+                    "text",
+                    sd.strftime("%d/%m/%y"),
+                    x=(x + offset) * mm,
+                    y=(y + 9) * mm,
                     fill=COLORS.START_END_DATES.value,
                     stroke=COLORS.START_END_DATES.value,
-                    stroke_width=_font_attributes()["stroke_width"],
-                    font_family=_font_attributes()["font_family"],
+                    stroke_width=font_stroke_width,
+                    font_family=font_family,
                     font_size=12,
                     style="text-anchor:end",
                 )
             )
             svg.add(
-                svgwrite.text.Text(
-                    self.end_date().strftime("%d/%m/%y"),
-                    insert=((x + offset + d) * mm, (y + 9) * mm),
+                _svg_element(
+                    "text",
+                    ed.strftime("%d/%m/%y"),
+                    x=(x + offset + d) * mm,
+                    y=(y + 9) * mm,
                     fill=COLORS.START_END_DATES.value,
                     stroke=COLORS.START_END_DATES.value,
-                    stroke_width=_font_attributes()["stroke_width"],
-                    font_family=_font_attributes()["font_family"],
+                    stroke_width=font_stroke_width,
+                    font_family=font_family,
                     font_size=12,
                 )
             )
@@ -1400,13 +2154,15 @@ class Task(object):
         if self.resources is not None:
             t = " / ".join(["{0}".format(r.name) for r in self.resources])
             svg.add(
-                svgwrite.text.Text(
+                _svg_element(
+                    "text",
                     "{0}".format(t),
-                    insert=((tx + offset) * mm, (y + 8.5) * mm),
+                    x=(tx + offset) * mm,
+                    y=(y + 8.5) * mm,
                     fill="purple",
-                    stroke=_font_attributes()["stroke"],
-                    stroke_width=_font_attributes()["stroke_width"],
-                    font_family=_font_attributes()["font_family"],
+                    stroke=font_stroke,
+                    stroke_width=font_stroke_width,
+                    font_family=font_family,
                     font_size=15 - 5,
                 )
             )
@@ -1421,204 +2177,53 @@ class Task(object):
         Keyword arguments:
         prj -- Project object to check against
         """
-        LOG.debug(
-            "** Task::svg_dependencies ({0})".format({"name": self.name, "prj": prj})
-        )
+        LOG.debug("** Task::svg_dependencies ({'name': %r, 'prj': %r})", self.name, prj)
         if self.depends_on is None:
             return None
         else:
-            svg = svgwrite.container.Group()
+            svg = _raw_svg_group()
+            x = self.drawn_x_begin_coord
             for t in self.depends_on:
-                if isinstance(t, Milestone):
-                    if not (
-                        t.drawn_x_end_coord is None
-                        or t.drawn_y_coord is None
-                        or self.drawn_x_begin_coord is None
-                    ) and prj.is_in_project(t):
-                        if t.drawn_x_end_coord < self.drawn_x_begin_coord:
-                            # horizontal line
-                            svg.add(
-                                svgwrite.shapes.Line(
-                                    start=(
-                                        (t.drawn_x_end_coord + 9) * mm,
-                                        (t.drawn_y_coord + 5) * mm,
-                                    ),
-                                    end=(
-                                        (self.drawn_x_begin_coord) * mm,
-                                        (t.drawn_y_coord + 5) * mm,
-                                    ),
-                                    stroke="black",
-                                    stroke_dasharray="5,3",
-                                )
-                            )
-
-                            marker = svgwrite.container.Marker(
-                                insert=(5, 5), size=(10, 10)
-                            )
-                            marker.add(
-                                svgwrite.shapes.Circle(
-                                    (5, 5),
-                                    r=5,
-                                    fill="#000000",
-                                    opacity=0.5,
-                                    stroke_width=0,
-                                )
-                            )
-                            svg.add(marker)
-                            # vertical line
-                            eline = svgwrite.shapes.Line(
-                                start=(
-                                    (self.drawn_x_begin_coord) * mm,
-                                    (t.drawn_y_coord + 5) * mm,
-                                ),
-                                end=(
-                                    (self.drawn_x_begin_coord) * mm,
-                                    (self.drawn_y_coord + 5) * mm,
-                                ),
-                                stroke="black",
-                                stroke_dasharray="5,3",
-                            )
-                            eline["marker-end"] = marker.get_funciri()
-                            svg.add(eline)
-
-                        else:
-                            # horizontal line
-                            svg.add(
-                                svgwrite.shapes.Line(
-                                    start=(
-                                        (t.drawn_x_end_coord + 9) * mm,
-                                        (t.drawn_y_coord + 5) * mm,
-                                    ),
-                                    end=(
-                                        (self.drawn_x_begin_coord + 10) * mm,
-                                        (t.drawn_y_coord + 5) * mm,
-                                    ),
-                                    stroke="black",
-                                    stroke_dasharray="5,3",
-                                )
-                            )
-                            # vertical
-                            svg.add(
-                                svgwrite.shapes.Line(
-                                    start=(
-                                        (self.drawn_x_begin_coord + 10) * mm,
-                                        (t.drawn_y_coord + 5) * mm,
-                                    ),
-                                    end=(
-                                        (self.drawn_x_begin_coord + 10) * mm,
-                                        (t.drawn_y_coord + 15) * mm,
-                                    ),
-                                    stroke="black",
-                                    stroke_dasharray="5,3",
-                                )
-                            )
-                            # horizontal line
-                            svg.add(
-                                svgwrite.shapes.Line(
-                                    start=(
-                                        (self.drawn_x_begin_coord) * mm,
-                                        (t.drawn_y_coord + 15) * mm,
-                                    ),
-                                    end=(
-                                        (self.drawn_x_begin_coord + 10) * mm,
-                                        (t.drawn_y_coord + 15) * mm,
-                                    ),
-                                    stroke="black",
-                                    stroke_dasharray="5,3",
-                                )
-                            )
-
-                            marker = svgwrite.container.Marker(
-                                insert=(5, 5), size=(10, 10)
-                            )
-                            marker.add(
-                                svgwrite.shapes.Circle(
-                                    (5, 5),
-                                    r=5,
-                                    fill="#000000",
-                                    opacity=0.5,
-                                    stroke_width=0,
-                                )
-                            )
-                            svg.add(marker)
-                            # vertical line
-                            eline = svgwrite.shapes.Line(
-                                start=(
-                                    (self.drawn_x_begin_coord) * mm,
-                                    (t.drawn_y_coord + 15) * mm,
-                                ),
-                                end=(
-                                    (self.drawn_x_begin_coord) * mm,
-                                    (self.drawn_y_coord + 5) * mm,
-                                ),
-                                stroke="black",
-                                stroke_dasharray="5,3",
-                            )
-                            eline["marker-end"] = marker.get_funciri()
-                            svg.add(eline)
-
-                elif isinstance(t, Task):
-                    if not (
-                        t.drawn_x_end_coord is None
-                        or t.drawn_y_coord is None
-                        or self.drawn_x_begin_coord is None
-                    ) and prj.is_in_project(t):
-                        # horizontal line
-                        svg.add(
-                            svgwrite.shapes.Line(
-                                start=(
-                                    (t.drawn_x_end_coord - 2) * mm,
-                                    (t.drawn_y_coord + 5) * mm,
-                                ),
-                                end=(
-                                    (self.drawn_x_begin_coord) * mm,
-                                    (t.drawn_y_coord + 5) * mm,
-                                ),
-                                stroke="black",
-                                stroke_dasharray="5,3",
-                            )
-                        )
-
-                        marker = svgwrite.container.Marker(insert=(5, 5), size=(10, 10))
-                        marker.add(
-                            svgwrite.shapes.Circle(
-                                (5, 5), r=5, fill="#000000", opacity=0.5, stroke_width=0
-                            )
-                        )
-                        svg.add(marker)
-                        # vertical line
-                        eline = svgwrite.shapes.Line(
-                            start=(
-                                (self.drawn_x_begin_coord) * mm,
-                                (t.drawn_y_coord + 5) * mm,
-                            ),
-                            end=(
-                                (self.drawn_x_begin_coord) * mm,
-                                (self.drawn_y_coord + 5) * mm,
-                            ),
-                            stroke="black",
-                            stroke_dasharray="5,3",
-                        )
-                        eline["marker-end"] = marker.get_funciri()
-                        svg.add(eline)
-
+                if (
+                    t.drawn_x_end_coord is None
+                    or t.drawn_y_coord is None
+                    or x is None
+                    or not prj.is_in_project(t)
+                ):
+                    continue
+                tx = t.drawn_x_end_coord + t._dep_line_dx
+                ty = t.drawn_y_coord + 5
+                if isinstance(t, Milestone) and t.drawn_x_end_coord >= x:
+                    # go round the task begining
+                    points = [
+                        (tx, ty),
+                        (x + 10, ty),
+                        (x + 10, ty + 10),
+                        (x, ty + 10),
+                        (x, self.drawn_y_coord + 5),
+                    ]
+                else:
+                    # horizontal then vertical line
+                    points = [(tx, ty), (x, ty), (x, self.drawn_y_coord + 5)]
+                svg.add(_dependency_path(points))
         return svg
 
     def nb_elements(self):
         """
         Returns the number of task, 1 here
         """
-        LOG.debug("** Task::nb_elements ({0})".format({"name": self.name}))
+        LOG.debug("** Task::nb_elements ({'name': %r})", self.name)
         return 1
 
     def _reset_coord(self):
         """
         Reset cached elements of task
         """
-        LOG.debug("** Task::reset_coord ({0})".format({"name": self.name}))
+        LOG.debug("** Task::reset_coord ({'name': %r})", self.name)
         self.drawn_x_begin_coord = None
         self.drawn_x_end_coord = None
         self.drawn_y_coord = None
+        # only this task's dates: nothing that days caches depend on changed
         self._cache_start_date = None
         self._cache_end_date = None
         return
@@ -1630,9 +2235,7 @@ class Task(object):
         Keyword arguments:
         task -- Task object
         """
-        LOG.debug(
-            "** Task::is_in_project ({0})".format({"name": self.name, "task": task})
-        )
+        LOG.debug("** Task::is_in_project ({'name': %r, 'task': %r})", self.name, task)
         if task is self:
             return True
 
@@ -1654,21 +2257,22 @@ class Task(object):
         conflicts = []
         if self.get_resources() is None:
             return conflicts
+        first = self.start_date().toordinal()
+        last = self.end_date().toordinal()
+        if last < first:
+            return conflicts
+        # week days on which a resource is not available
+        worked = ~_days_off_bits(first, last - first + 1)
         for r in self.get_resources():
-            cday = self.start_date()
-            while cday <= self.end_date():
-                if cday.weekday() not in _not_worked_days() and not r.is_available(
-                    cday
-                ):
-                    conflicts.append(
-                        {"resource": r.name, "date": cday, "task": self.name}
-                    )
-                    LOG.warning(
-                        '** Caution resource "{0}" is affected on task "{2}" during vacations on day {1}'.format(
-                            r.name, cday, self.fullname
-                        )
+            bits = r._work_calendar().bits_between(first, last) & worked
+            for index in _bit_indices(bits):
+                cday = datetime.date.fromordinal(first + index)
+                conflicts.append({"resource": r.name, "date": cday, "task": self.name})
+                LOG.warning(
+                    '** Caution resource "{0}" is affected on task "{2}" during vacations on day {1}'.format(
+                        r.name, cday, self.fullname
                     )
-                cday += datetime.timedelta(days=1)
+                )
         return conflicts
 
     def csv(self, csv=None):
@@ -1683,7 +2287,7 @@ class Task(object):
         else:
             resources = ""
 
-        csv_text = '"{0}";"{1}";{2};{3};{4};"{5}";\r\n'.format(
+        return _CSV_ROW(
             self.state.replace('"', '\\"'),
             self.fullname.replace('"', '\\"'),
             self.start_date(),
@@ -1691,7 +2295,6 @@ class Task(object):
             self.duration,
             resources.replace('"', '\\"'),
         )
-        return csv_text
 
 
 ############################################################################
@@ -1702,6 +2305,14 @@ class Milestone(Task):
     Class for manipulating Milestones
     """
 
+    __slots__ = ()
+
+    _dep_end_delta = datetime.timedelta(days=-1)
+    _dep_line_dx = 9
+    # wrap each milestone in a group carrying its SVG id (nothing refers to
+    # it by default, so the shapes are drawn directly in the project group)
+    svg_group_id = False
+
     def __init__(
         self, name, start=None, depends_on=None, color=None, fullname=None, display=True
     ):
@@ -1720,11 +2331,13 @@ class Milestone(Task):
         display -- boolean, display this milestone, default True
         """
         LOG.debug(
-            "** Milestone::__init__ {0}".format(
-                {"name": name, "start": start, "depends_on": depends_on}
-            )
+            "** Milestone::__init__ {'name': %r, 'start': %r, 'depends_on': %r}",
+            name,
+            start,
+            depends_on,
         )
         self.name = name
+        self._svg_id = str(name).translate(_ID_TRANS)
         if fullname is not None:
             self.fullname = fullname
         else:
@@ -1743,12 +2356,7 @@ class Milestone(Task):
         self.display = display
         self.state = "Milestone"
 
-        if type(depends_on) is type([]):
-            self.depends_on = depends_on
-        elif depends_on is not None:
-            self.depends_on = [depends_on]
-        else:
-            self.depends_on = None
+        self.depends_on = _dependency_list(depends_on)
 
         self.drawn_x_begin_coord = None
         self.drawn_x_end_coord = None
@@ -1763,8 +2371,8 @@ class Milestone(Task):
         Returns the last day of the milestone, either the one which was given at milestone
         creation or the one calculated after checking dependencies
         """
-        LOG.debug("** Milestone::end_date ({0})".format(self.name))
-        # return self.start_date() - datetime.timedelta(days=1)
+        LOG.debug("** Milestone::end_date (%s)", self.name)
+        # return self.start_date() - _ONE_DAY
         return self.start_date()
 
     def svg(
@@ -1781,7 +2389,8 @@ class Milestone(Task):
         macro_mode=False,
     ):
         """
-        Return SVG for drawing this milestone.
+        Return SVG for drawing this milestone: raw XML string of its shapes,
+        or a group with the milestone SVG id if svg_group_id is True.
 
         Keyword arguments:
         prev_y -- int, line to start to draw
@@ -1793,34 +2402,35 @@ class Milestone(Task):
         title_align_on_left -- boolean, align milestone title on left
         offset -- X offset from image border to start of drawing zone
         """
+        font_fill, font_stroke, font_stroke_width, font_family = _font_tuple()
         LOG.debug(
-            "** Milestone::svg ({0})".format(
-                {
-                    "name": self.name,
-                    "prev_y": prev_y,
-                    "start": start,
-                    "end": end,
-                    "color": color,
-                    "level": level,
-                }
-            )
+            "** Milestone::svg ({'name': %r, 'prev_y': %r, 'start': %r, 'end': %r, 'color': %r, 'level': %r})",
+            self.name,
+            prev_y,
+            start,
+            end,
+            color,
+            level,
         )
 
         if not self.display:
-            LOG.debug("** Milestone::svg ({0}) display off".format({"name": self.name}))
+            LOG.debug("** Milestone::svg ({'name': %r}) display off", self.name)
             return (None, 0)
 
         # add_modified_begin_mark = False
         # add_modified_end_mark = False
 
+        sd = self.start_date()
+        ed = self.end_date()
+
         if start is None:
-            start = self.start_date()
+            start = sd
 
         # if self.start_date() != self.start and self.start is not None:
         #    add_modified_begin_mark = True
 
         if end is None:
-            end = self.end_date()
+            end = ed
 
         # if self.end_date() != self.stop and self.stop is not None:
         #    add_modified_end_mark = True
@@ -1840,8 +2450,8 @@ class Milestone(Task):
             raise ValueError(message)
 
         # cas 1 -s--X--e-
-        if self.start_date() >= start and self.end_date() <= end:
-            x = _time_diff(scale, start, self.start_date(), False) * 10
+        if sd >= start and ed <= end:
+            x = _time_diff(scale, start, sd, False) * 10
             self.drawn_x_begin_coord = x
             self.drawn_x_end_coord = x
         else:
@@ -1852,16 +2462,19 @@ class Milestone(Task):
         # insert=((x+1)*mm, (y+1)*mm),
         # size=((d-2)*mm, 8*mm),
 
-        svg = svgwrite.container.Group(id=re.sub(r"[ ,'\/()]", "_", self.name))
+        svg = _raw_svg_group(id=self._svg_id)
         # 3.543307 is for conversion from mm to pt units !
         svg.add(
-            svgwrite.shapes.Polygon(
-                points=[
-                    ((x + 5 + offset) * mm, (y + 2) * mm),
-                    ((x + 8 + offset) * mm, (y + 5) * mm),
-                    ((x + 5 + offset) * mm, (y + 8) * mm),
-                    ((x + 2 + offset) * mm, (y + 5) * mm),
-                ],
+            _svg_element(
+                "polygon",
+                points=_svg_points(
+                    [
+                        ((x + 5 + offset) * mm, (y + 2) * mm),
+                        ((x + 8 + offset) * mm, (y + 5) * mm),
+                        ((x + 5 + offset) * mm, (y + 8) * mm),
+                        ((x + 2 + offset) * mm, (y + 5) * mm),
+                    ]
+                ),
                 fill=color,
                 stroke=color,
                 stroke_width=2,
@@ -1875,30 +2488,36 @@ class Milestone(Task):
             tx = 5
 
         svg.add(
-            svgwrite.text.Text(
+            _svg_element(
+                "text",
                 self.fullname,
-                insert=((tx) * mm, (y + 5) * mm),
-                fill=_font_attributes()["fill"],
-                stroke=_font_attributes()["stroke"],
-                stroke_width=_font_attributes()["stroke_width"],
-                font_family=_font_attributes()["font_family"],
+                x=(tx) * mm,
+                y=(y + 5) * mm,
+                fill=font_fill,
+                stroke=font_stroke,
+                stroke_width=font_stroke_width,
+                font_family=font_family,
                 font_size=15,
             )
         )
 
         if show_start_end_dates:
             svg.add(
-                svgwrite.text.Text(
-                    self.start_date().strftime("%d/%m/%y"),
-                    insert=((x + 10 + offset) * mm, (y + 9) * mm),
+                _svg_element(
+                    "text",
+                    sd.strftime("%d/%m/%y"),
+                    x=(x + 10 + offset) * mm,
+                    y=(y + 9) * mm,
                     fill=COLORS.START_END_DATES.value,
                     stroke=COLORS.START_END_DATES.value,
-                    stroke_width=_font_attributes()["stroke_width"],
-                    font_family=_font_attributes()["font_family"],
+                    stroke_width=font_stroke_width,
+                    font_family=font_family,
                     font_size=12,
                 )
             )
 
+        if not self.svg_group_id:
+            return ("".join(svg.elements), 1)
         return (svg, 1)
 
     def svg_dependencies(self, prj):
@@ -1910,104 +2529,26 @@ class Milestone(Task):
         prj -- Project object to check against
         """
         LOG.debug(
-            "** Milestone::svg_dependencies ({0})".format(
-                {"name": self.name, "prj": prj}
-            )
+            "** Milestone::svg_dependencies ({'name': %r, 'prj': %r})", self.name, prj
         )
         if self.depends_on is None:
             return None
         else:
-            svg = svgwrite.container.Group()
+            svg = _raw_svg_group()
+            x = self.drawn_x_begin_coord
             for t in self.depends_on:
-                if isinstance(t, Milestone):
-                    if not (
-                        t.drawn_x_end_coord is None
-                        or t.drawn_y_coord is None
-                        or self.drawn_x_begin_coord is None
-                    ) and prj.is_in_project(t):
-                        # horizontal line
-                        svg.add(
-                            svgwrite.shapes.Line(
-                                start=(
-                                    (t.drawn_x_end_coord + 9) * mm,
-                                    (t.drawn_y_coord + 5) * mm,
-                                ),
-                                end=(
-                                    (self.drawn_x_begin_coord + 5) * mm,
-                                    (t.drawn_y_coord + 5) * mm,
-                                ),
-                                stroke="black",
-                                stroke_dasharray="5,3",
-                            )
-                        )
-
-                        marker = svgwrite.container.Marker(insert=(5, 5), size=(10, 10))
-                        marker.add(
-                            svgwrite.shapes.Circle(
-                                (5, 5), r=5, fill="#000000", opacity=0.5, stroke_width=0
-                            )
-                        )
-                        svg.add(marker)
-                        # vertical line
-                        eline = svgwrite.shapes.Line(
-                            start=(
-                                (self.drawn_x_begin_coord + 5) * mm,
-                                (t.drawn_y_coord + 5) * mm,
-                            ),
-                            end=(
-                                (self.drawn_x_begin_coord + 5) * mm,
-                                (self.drawn_y_coord) * mm,
-                            ),
-                            stroke="black",
-                            stroke_dasharray="5,3",
-                        )
-                        eline["marker-end"] = marker.get_funciri()
-                        svg.add(eline)
-
-                elif isinstance(t, Task):
-                    if not (
-                        t.drawn_x_end_coord is None
-                        or t.drawn_y_coord is None
-                        or self.drawn_x_begin_coord is None
-                    ) and prj.is_in_project(t):
-                        # horizontal line
-                        svg.add(
-                            svgwrite.shapes.Line(
-                                start=(
-                                    (t.drawn_x_end_coord - 2) * mm,
-                                    (t.drawn_y_coord + 5) * mm,
-                                ),
-                                end=(
-                                    (self.drawn_x_begin_coord + 5) * mm,
-                                    (t.drawn_y_coord + 5) * mm,
-                                ),
-                                stroke="black",
-                                stroke_dasharray="5,3",
-                            )
-                        )
-
-                        marker = svgwrite.container.Marker(insert=(5, 5), size=(10, 10))
-                        marker.add(
-                            svgwrite.shapes.Circle(
-                                (5, 5), r=5, fill="#000000", opacity=0.5, stroke_width=0
-                            )
-                        )
-                        svg.add(marker)
-                        # vertical line
-                        eline = svgwrite.shapes.Line(
-                            start=(
-                                (self.drawn_x_begin_coord + 5) * mm,
-                                (t.drawn_y_coord + 5) * mm,
-                            ),
-                            end=(
-                                (self.drawn_x_begin_coord + 5) * mm,
-                                (self.drawn_y_coord + 0) * mm,
-                            ),
-                            stroke="black",
-                            stroke_dasharray="5,3",
-                        )
-                        eline["marker-end"] = marker.get_funciri()
-                        svg.add(eline)
+                if (
+                    t.drawn_x_end_coord is None
+                    or t.drawn_y_coord is None
+                    or x is None
+                    or not prj.is_in_project(t)
+                ):
+                    continue
+                tx = t.drawn_x_end_coord + t._dep_line_dx
+                ty = t.drawn_y_coord + 5
+                # horizontal then vertical line
+                points = [(tx, ty), (x + 5, ty), (x + 5, self.drawn_y_coord)]
+                svg.add(_dependency_path(points))
 
         return svg
 
@@ -2026,30 +2567,31 @@ class Milestone(Task):
         """
         return []
 
-    def csv(self, csv=None):
-        """
-        Create CSV output from milestones
 
-        Keyword arguments:
-        csv -- None, dymmy object
-        """
-        if self.resources is not None:
-            resources = ", ".join([x.fullname for x in self.resources])
-        else:
-            resources = ""
+##</Milestone>##############################################################
 
-        csv_text = '"{0}";"{1}";{2};{3};{4};"{5}";\r\n'.format(
-            self.state.replace('"', '\\"'),
-            self.fullname.replace('"', '\\"'),
-            self.start_date(),
-            self.end_date(),
-            self.duration,
-            resources.replace('"', '\\"'),
-        )
-        return csv_text
+############################################################################
 
 
-##</Milestone>##############################################################
+class _MacroTask(Task):
+    """
+    Task standing for all the tasks of a project drawn in macro mode
+    """
+
+    __slots__ = ("project",)
+
+    def start_date(self):
+        """
+        Returns the first day of the project
+        """
+        return self.project.start_date()
+
+    def end_date(self):
+        """
+        Returns the last day of the project
+        """
+        return self.project.end_date()
+
 
 ############################################################################
 
@@ -2059,6 +2601,9 @@ class Project(object):
     Class for handling projects
     """
 
+    # projects are always drawn, only tasks and milestones may be hidden
+    display = True
+
     def __init__(
         self,
         name="",
@@ -2081,9 +2626,14 @@ class Project(object):
             self.color = color
 
         self.cache_nb_elements = None
+        # (_DAYS_VERSION, date) of the last computed first and last days, the
+        # version being bumped when task dates change or are reset
+        self._cache_start_date = None
+        self._cache_end_date = None
         self.description = description
         self.show_description = show_description
-        self.macro_task = Task(self.name, color=self.color)
+        self.macro_task = _MacroTask(self.name, color=self.color)
+        self.macro_task.project = self
         return
 
     def add_task(self, task):
@@ -2095,6 +2645,7 @@ class Project(object):
         """
         self.tasks.append(task)
         self.cache_nb_elements = None
+        _days_changed()
         return
 
     def _svg_calendar(
@@ -2119,30 +2670,70 @@ class Project(object):
         scale -- drawing scale (d: days, w: weeks, m: months, q: quaterly)
         offset -- X offset from image border to start of drawing zone
         """
-        dwg = svgwrite.container.Group()
+        font_family = _font_tuple().font_family
+        dwg = _raw_svg_group()
 
-        cal = {0: "Lu", 1: "Ma", 2: "Me", 3: "Je", 4: "Ve", 5: "Sa", 6: "Di"}
+        # Month names follow the LC_TIME locale, which may be set after import
+        month_names = [datetime.date(2000, m, 1).strftime("%B") for m in range(1, 13)]
 
         maxx += 1
 
-        vlines = dwg.add(svgwrite.container.Group(id="vlines", stroke="lightgray"))
-        for x in range(maxx):
-            vlines.add(
-                svgwrite.shapes.Line(
-                    start=((x + offset / 10) * cm, 2 * cm),
-                    end=((x + offset / 10) * cm, (maxy + 2) * cm),
+        # raw groups are serialized when added: fill them before adding them
+        vlines = _raw_svg_group(id="vlines", stroke="lightgray")
+        start_ordinal = start_date.toordinal()
+        if scale == DRAW_WITH_DAILY_SCALE:
+            # Non worked days of the whole drawing, bit x being column x
+            days_off = _GLOBAL_CALENDAR.bits_between(
+                start_ordinal, start_ordinal + maxx - 1
+            )
+            start_weekday = start_date.weekday()
+            # ISO week number, updated on each Monday
+            iso_week = None
+            # days off are drawn as copies of a single rect
+            if days_off:
+                vlines.add(
+                    _svg_template(
+                        _DAY_OFF_TEMPLATE_ID,
+                        "rect",
+                        width=1 * cm,
+                        height=maxy * cm,
+                        fill="gray",
+                        stroke="lightgray",
+                        stroke_width=1,
+                        opacity=0.7,
+                    )
                 )
+        # column of today at daily and weekly scales, None if not drawn
+        today_x = None
+        if today is not None and scale in (
+            DRAW_WITH_DAILY_SCALE,
+            DRAW_WITH_WEEKLY_SCALE,
+        ):
+            step = 1 if scale == DRAW_WITH_DAILY_SCALE else 7
+            today_x = (today.toordinal() - start_ordinal) // step
+        # all vertical grid lines in a single path, drawn below the day shapes
+        top, bottom = _fmt(2 * cm), _fmt((maxy + 2) * cm)
+        vlines.add(
+            _svg_element(
+                "path",
+                d="".join(
+                    "M{0},{1}V{2}".format(_fmt((x + offset / 10) * cm), top, bottom)
+                    for x in range(maxx + 1)
+                ),
+                fill="none",
             )
+        )
+        for x in range(maxx):
             if scale == DRAW_WITH_DAILY_SCALE:
-                jour = start_date + datetime.timedelta(days=x)
-                is_it_today = today == jour
+                jour = datetime.date.fromordinal(start_ordinal + x)
+                weekday = (start_weekday + x) % 7
+                is_it_today = x == today_x
             elif scale == DRAW_WITH_WEEKLY_SCALE:
-                jour = start_date + relativedelta(weeks=x)
-                jour_dapres = start_date + relativedelta(weeks=x + 1)
-                is_it_today = today >= jour and today < jour_dapres
+                jour = datetime.date.fromordinal(start_ordinal + 7 * x)
+                is_it_today = x == today_x
             elif scale == DRAW_WITH_MONTHLY_SCALE:
-                jour = start_date + relativedelta(months=x)
-                jour_dapres = start_date + relativedelta(months=x + 1)
+                jour = _add_months(start_date, x)
+                jour_dapres = _add_months(start_date, x + 1)
                 is_it_today = today >= jour and today < jour_dapres
             elif scale == DRAW_WITH_QUATERLY_SCALE:
                 # how many quarter do we need to draw ?
@@ -2152,9 +2743,12 @@ class Project(object):
 
             if is_it_today:
                 vlines.add(
-                    svgwrite.shapes.Rect(
-                        insert=((x + 0.4 + offset / 10) * cm, 1 * cm),
-                        size=(0.2 * cm, (maxy + 1) * cm),
+                    _svg_element(
+                        "rect",
+                        x=(x + 0.4 + offset / 10) * cm,
+                        y=1 * cm,
+                        width=0.2 * cm,
+                        height=(maxy + 1) * cm,
                         fill=COLORS.TODAY.value,
                         stroke="lightgray",
                         stroke_width=0,
@@ -2164,31 +2758,22 @@ class Project(object):
 
             if scale == DRAW_WITH_DAILY_SCALE:
                 # draw vacations
-                if (
-                    start_date + datetime.timedelta(days=x)
-                ).weekday() in _not_worked_days() or (
-                    start_date + datetime.timedelta(days=x)
-                ) in VACATIONS:
+                if days_off >> x & 1:
                     vlines.add(
-                        svgwrite.shapes.Rect(
-                            insert=((x + offset / 10) * cm, 2 * cm),
-                            size=(1 * cm, maxy * cm),
-                            fill="gray",
-                            stroke="lightgray",
-                            stroke_width=1,
-                            opacity=0.7,
-                        )
+                        _svg_use(_DAY_OFF_TEMPLATE_ID, (x + offset / 10) * cm, 2 * cm)
                     )
 
                 # Current day
                 vlines.add(
-                    svgwrite.text.Text(
-                        "{1} {0:02}".format(jour.day, cal[jour.weekday()][0]),
-                        insert=((x * 10 + 1 + offset) * mm, 19 * mm),
+                    _svg_element(
+                        "text",
+                        "{1} {0:02}".format(jour.day, _WEEKDAY_INITIALS[weekday]),
+                        x=(x * 10 + 1 + offset) * mm,
+                        y=19 * mm,
                         fill="black",
                         stroke="black",
                         stroke_width=0,
-                        font_family=_font_attributes()["font_family"],
+                        font_family=font_family,
                         font_size=15 - 3,
                     )
                 )
@@ -2199,13 +2784,15 @@ class Project(object):
                     else:
                         text = "{0}".format(jour.year)
                     vlines.add(
-                        svgwrite.text.Text(
+                        _svg_element(
+                            "text",
                             text,
-                            insert=((x * 10 + 1 + offset) * mm, 5 * mm),
+                            x=(x * 10 + 1 + offset) * mm,
+                            y=5 * mm,
                             fill=COLORS.YEARS.value,
                             stroke=COLORS.YEARS.value,
                             stroke_width=0,
-                            font_family=_font_attributes()["font_family"],
+                            font_family=font_family,
                             font_size=15 + 5,
                             font_weight="bold",
                         )
@@ -2218,53 +2805,61 @@ class Project(object):
                         )
                         text = f"Mois M{delta+1}"
                     else:
-                        text = "{0}".format(jour.strftime("%B"))
+                        text = month_names[jour.month - 1]
                     vlines.add(
-                        svgwrite.text.Text(
+                        _svg_element(
+                            "text",
                             text,
-                            insert=((x * 10 + 1 + offset) * mm, 10 * mm),
+                            x=(x * 10 + 1 + offset) * mm,
+                            y=10 * mm,
                             fill="#800000",
                             stroke="#800000",
                             stroke_width=0,
-                            font_family=_font_attributes()["font_family"],
+                            font_family=font_family,
                             font_size=15 + 3,
                             font_weight="bold",
                         )
                     )
                 # Week number
-                if jour.weekday() == 0:
+                if weekday == 0:
                     if t0mode:
                         text = f"S{(jour-start_date).days//7+1}"
                     else:
-                        text = "{0:02}".format(jour.isocalendar()[1])
+                        iso_week = _next_iso_week(jour, iso_week)
+                        text = "{0:02}".format(iso_week)
                     vlines.add(
-                        svgwrite.text.Text(
+                        _svg_element(
+                            "text",
                             text,
-                            insert=((x * 10 + 1 + offset) * mm, 15 * mm),
+                            x=(x * 10 + 1 + offset) * mm,
+                            y=15 * mm,
                             fill="black",
                             stroke="black",
                             stroke_width=0,
-                            font_family=_font_attributes()["font_family"],
+                            font_family=font_family,
                             font_size=15 + 1,
                             font_weight="bold",
                         )
                     )
 
             elif scale == DRAW_WITH_WEEKLY_SCALE:
+                iso_week = jour.isocalendar()[1]
                 # Year
-                if jour.isocalendar()[1] == 1 and jour.month == 1:
+                if iso_week == 1 and jour.month == 1:
                     if t0mode:
                         text = f"Année A{jour.year - start_date.year + 1}"
                     else:
                         text = "{0}".format(jour.year)
                     vlines.add(
-                        svgwrite.text.Text(
+                        _svg_element(
+                            "text",
                             text,
-                            insert=((x * 10 + 1 + offset) * mm, 5 * mm),
+                            x=(x * 10 + 1 + offset) * mm,
+                            y=5 * mm,
                             fill=COLORS.YEARS.value,
                             stroke=COLORS.YEARS.value,
                             stroke_width=0,
-                            font_family=_font_attributes()["font_family"],
+                            font_family=font_family,
                             font_size=15 + 5,
                             font_weight="bold",
                         )
@@ -2277,15 +2872,17 @@ class Project(object):
                         )
                         text = f"Mois M{delta+1}"
                     else:
-                        text = "{0}".format(jour.strftime("%B"))
+                        text = month_names[jour.month - 1]
                     vlines.add(
-                        svgwrite.text.Text(
+                        _svg_element(
+                            "text",
                             text,
-                            insert=((x * 10 + 1 + offset) * mm, 10 * mm),
+                            x=(x * 10 + 1 + offset) * mm,
+                            y=10 * mm,
                             fill="#800000",
                             stroke="#800000",
                             stroke_width=0,
-                            font_family=_font_attributes()["font_family"],
+                            font_family=font_family,
                             font_size=15 + 3,
                             font_weight="bold",
                         )
@@ -2293,15 +2890,17 @@ class Project(object):
                 if t0mode:
                     text = f"S{(jour-start_date).days//7+1}"
                 else:
-                    text = "{0:02}".format(jour.isocalendar()[1])
+                    text = "{0:02}".format(iso_week)
                 vlines.add(
-                    svgwrite.text.Text(
+                    _svg_element(
+                        "text",
                         text,
-                        insert=((x * 10 + 1 + offset) * mm, 15 * mm),
+                        x=(x * 10 + 1 + offset) * mm,
+                        y=15 * mm,
                         fill="black",
                         stroke="black",
                         stroke_width=0,
-                        font_family=_font_attributes()["font_family"],
+                        font_family=font_family,
                         font_size=15 + 1,
                         font_weight="bold",
                     )
@@ -2315,15 +2914,17 @@ class Project(object):
                     )
                     text = f"M{delta+1}"
                 else:
-                    text = "{0}".format(jour.strftime("%m"))
+                    text = "{0:02}".format(jour.month)
                 vlines.add(
-                    svgwrite.text.Text(
+                    _svg_element(
+                        "text",
                         text,
-                        insert=((x * 10 + 1 + offset) * mm, 19 * mm),
+                        x=(x * 10 + 1 + offset) * mm,
+                        y=19 * mm,
                         fill="black",
                         stroke="black",
                         stroke_width=0,
-                        font_family=_font_attributes()["font_family"],
+                        font_family=font_family,
                         font_size=15 - 3,
                     )
                 )
@@ -2334,21 +2935,26 @@ class Project(object):
                     else:
                         text = "{0}".format(jour.year)
                     vlines.add(
-                        svgwrite.text.Text(
+                        _svg_element(
+                            "text",
                             text,
-                            insert=((x * 10 + 1 + offset) * mm, 5 * mm),
+                            x=(x * 10 + 1 + offset) * mm,
+                            y=5 * mm,
                             fill=COLORS.YEARS.value,
                             stroke=COLORS.YEARS.value,
                             stroke_width=0,
-                            font_family=_font_attributes()["font_family"],
+                            font_family=font_family,
                             font_size=15 + 5,
                             font_weight="bold",
                         )
                     )
                     vlines.add(
-                        svgwrite.shapes.Line(
-                            start=((x + offset / 10) * cm, 0),
-                            end=((x + offset / 10) * cm, (maxy + 2) * cm),
+                        _svg_element(
+                            "line",
+                            x1=(x + offset / 10) * cm,
+                            y1=0,
+                            x2=(x + offset / 10) * cm,
+                            y2=(maxy + 2) * cm,
                             stroke=COLORS.YEARS.value,
                             stroke_dasharray="2,2",
                         )
@@ -2360,38 +2966,43 @@ class Project(object):
                 LOG.critical(message)
                 raise ValueError(message)
 
-        vlines.add(
-            svgwrite.shapes.Line(
-                start=((maxx + offset / 10) * cm, 2 * cm),
-                end=((maxx + offset / 10) * cm, (maxy + 2) * cm),
+        dwg.add(vlines)
+
+        hlines = _raw_svg_group(id="hlines", stroke="lightgray")
+        left, right = _fmt((0 + offset / 10) * cm), _fmt((maxx + offset / 10) * cm)
+        hlines.add(
+            _svg_element(
+                "path",
+                d="".join(
+                    "M{0},{1}H{2}".format(left, _fmt(y * cm), right)
+                    for y in range(2, maxy + 3)
+                ),
+                fill="none",
             )
         )
-
-        hlines = dwg.add(svgwrite.container.Group(id="hlines", stroke="lightgray"))
+        dwg.add(hlines)
 
         dwg.add(
-            svgwrite.shapes.Line(
-                start=((0 + offset / 10) * cm, (2) * cm),
-                end=((maxx + offset / 10) * cm, (2) * cm),
+            _svg_element(
+                "line",
+                x1=(0 + offset / 10) * cm,
+                y1=(2) * cm,
+                x2=(maxx + offset / 10) * cm,
+                y2=(2) * cm,
                 stroke="black",
             )
         )
         dwg.add(
-            svgwrite.shapes.Line(
-                start=((0 + offset / 10) * cm, (maxy + 2) * cm),
-                end=((maxx + offset / 10) * cm, (maxy + 2) * cm),
+            _svg_element(
+                "line",
+                x1=(0 + offset / 10) * cm,
+                y1=(maxy + 2) * cm,
+                x2=(maxx + offset / 10) * cm,
+                y2=(maxy + 2) * cm,
                 stroke="black",
             )
         )
 
-        for y in range(2, maxy + 3):
-            hlines.add(
-                svgwrite.shapes.Line(
-                    start=((0 + offset / 10) * cm, y * cm),
-                    end=((maxx + offset / 10) * cm, y * cm),
-                )
-            )
-
         return dwg
 
     def make_svg_for_tasks(
@@ -2405,6 +3016,7 @@ class Project(object):
         offset=0,
         t0mode=False,
         macro_mode=False,
+        fast=False,
     ):
         """
         Draw gantt of tasks and output it to filename. If start or end are
@@ -2418,6 +3030,8 @@ class Project(object):
         scale -- drawing scale (d: days, w: weeks, m: months, q: quaterly)
         title_align_on_left -- boolean, align task title on left
         offset -- X offset from image border to start of drawing zone
+        fast -- boolean, write SVG directly from raw XML strings instead of
+        building the whole svgwrite document, default False
         """
         if len(self.tasks) == 0:
             LOG.warning("** Empty project : {0}".format(self.name))
@@ -2434,7 +3048,7 @@ class Project(object):
             LOG.critical(message)
             raise ValueError(message)
 
-        ldwg = svgwrite.container.Group()
+        ldwg = _raw_svg_group() if fast else svgwrite.container.Group()
         psvg, pheight = self.svg(
             prev_y=2,
             start=start_date,
@@ -2454,24 +3068,33 @@ class Project(object):
 
         maxx = _get_maxx(scale, start_date, end_date)
 
-        dwg = _my_svgwrite_drawing_wrapper(filename, debug=True)
-        dwg.add(
-            svgwrite.shapes.Rect(
-                insert=((0) * cm, 0 * cm),
-                size=((maxx + 1 + offset / 10) * cm, (pheight + 3) * cm),
-                fill="white",
-                stroke_width=0,
-                opacity=1,
-            )
+        width = (maxx + 1 + offset / 10) * cm
+        height = (pheight + 3) * cm
+        background = svgwrite.shapes.Rect(
+            insert=((0) * cm, 0 * cm),
+            size=(width, height),
+            fill="white",
+            stroke_width=0,
+            opacity=1,
+        )
+        calendar = self._svg_calendar(
+            maxx, pheight, start_date, today, scale, offset=offset, t0mode=t0mode
         )
 
-        dwg.add(
-            self._svg_calendar(
-                maxx, pheight, start_date, today, scale, offset=offset, t0mode=t0mode
+        if fast:
+            _write_svg_direct(
+                filename,
+                width,
+                height,
+                [background, calendar, ldwg],
             )
-        )
+            return
+
+        dwg = _my_svgwrite_drawing_wrapper(filename)
+        dwg.add(background)
+        dwg.add(calendar)
         dwg.add(ldwg)
-        dwg.save(width=(maxx + 1 + offset / 10) * cm, height=(pheight + 3) * cm)
+        dwg.save(width=width, height=height)
         return
 
     def make_svg_for_resources(
@@ -2491,6 +3114,7 @@ class Project(object):
         show_title=True,
         show_conflicts=True,
         show_vacations=True,
+        fast=False,
     ):
         """
         Draw resources affectation and output it to filename. If start or end are
@@ -2510,8 +3134,11 @@ class Project(object):
         scale -- drawing scale (d: days, w: weeks, m: months, q: quaterly)
         title_align_on_left -- boolean, align task title on left
         offset -- X offset from image border to start of drawing zone
+        fast -- boolean, write SVG directly from raw XML strings instead of
+        building the whole svgwrite document, default False
         """
 
+        font_fill, font_stroke, font_stroke_width, font_family = _font_tuple()
         if scale not in (DRAW_WITH_DAILY_SCALE, DRAW_WITH_WEEKLY_SCALE):
             show_conflicts = show_vacations = False
 
@@ -2540,28 +3167,78 @@ class Project(object):
             # No resources
             return {}
 
+        tasks = self.get_tasks()
+
         # detect conflicts between resources and holidays
-        conflicts_vacations = []
-        for t in self.get_tasks():
-            conflicts_vacations.append(
-                t.check_conflicts_between_task_and_resources_vacations()
+        conflicts_vacations = list(
+            itertools.chain.from_iterable(
+                t.check_conflicts_between_task_and_resources_vacations() for t in tasks
             )
+        )
 
-        conflicts_vacations = _flatten(conflicts_vacations)
+        ldwg = _raw_svg_group()
 
-        ldwg = svgwrite.container.Group()
+        # lines separating resources, drawn as a single path at the end
+        border_ys = [] if one_line_for_tasks else [2]
 
-        if not one_line_for_tasks:
+        # vacation and overcharge days are drawn as copies of a single rect
+        opacity = 0.65
+        if scale == DRAW_WITH_WEEKLY_SCALE:
+            opacity /= 4.0
+        if show_vacations:
             ldwg.add(
-                svgwrite.shapes.Line(
-                    start=((0) * cm, (2) * cm),
-                    end=((maxx + 1 + offset / 10) * cm, (2) * cm),
-                    stroke="black",
+                _svg_template(
+                    _VACATION_TEMPLATE_ID,
+                    "rect",
+                    width=4 * mm if show_conflicts else 8 * mm,
+                    height=8 * mm,
+                    fill=COLORS.VACATIONS.value,
+                    fill_opacity=round(opacity, 2),
+                )
+            )
+        if show_conflicts:
+            ldwg.add(
+                _svg_template(
+                    _OVERCHARGE_TEMPLATE_ID,
+                    "rect",
+                    width=4 * mm if show_vacations else 8 * mm,
+                    height=8 * mm,
+                    fill="#AA0000",
+                    fill_opacity=round(opacity, 2),
                 )
             )
 
         nline = 2 if show_title else 1
         conflicts_tasks = []
+        # global days off of the drawing (bit 0 being start_date), shared by
+        # all resources
+        first_ordinal = start_date.toordinal()
+        last_ordinal = end_date.toordinal()
+        ndays = max(last_ordinal - first_ordinal + 1, 0)
+        # column of each drawn day, i.e. _time_diff(scale, start_date, day, False)
+        # for day index i, computed once in closed form for all resources
+        if scale == DRAW_WITH_DAILY_SCALE:
+            diffs = range(ndays)
+        elif scale == DRAW_WITH_WEEKLY_SCALE:
+            start_weekday = start_date.weekday()
+            diffs = [(i + start_weekday) // 7 for i in range(ndays)]
+        elif scale == DRAW_WITH_MONTHLY_SCALE:
+            diffs = [
+                (day.year - start_date.year) * 12 + day.month - start_date.month
+                for day in map(
+                    datetime.date.fromordinal, range(first_ordinal, last_ordinal + 1)
+                )
+            ]
+        else:
+            diffs = [
+                _time_diff(scale, start_date, start_date + i * _ONE_DAY, False)
+                for i in range(ndays)
+            ]
+        global_off = 0
+        if last_ordinal >= first_ordinal:
+            global_off = _GLOBAL_CALENDAR.bits_between(first_ordinal, last_ordinal)
+        # resources of each task, looked up once for all resources
+        tasks_resources = [(t, frozenset(t.get_resources() or ())) for t in tasks]
         conflict_display_line = 1
         for r in resources:
             # do stuff for each resource
@@ -2569,12 +3246,15 @@ class Project(object):
                 continue
 
             nline_ress = nline + 1 if resource_on_left else nline
-            ress = svgwrite.container.Group()
+            ress = _raw_svg_group()
             if resource_on_left and r.color is not None:
                 ress.add(
-                    svgwrite.shapes.Rect(
-                        insert=(0, (nline_ress * 10 + 1) * mm),
-                        size=((offset - 3) * mm, 8 * mm),
+                    _svg_element(
+                        "rect",
+                        x=0,
+                        y=(nline_ress * 10 + 1) * mm,
+                        width=(offset - 3) * mm,
+                        height=8 * mm,
                         fill=r.color,
                         stroke=r.color,
                         stroke_width=1,
@@ -2582,13 +3262,15 @@ class Project(object):
                     )
                 )
             ress.add(
-                svgwrite.text.Text(
+                _svg_element(
+                    "text",
                     "{0}".format(r.fullname),
-                    insert=(3 * mm, (nline_ress * 10 + 7) * mm),
-                    fill=_font_attributes()["fill"],
-                    stroke=_font_attributes()["stroke"],
-                    stroke_width=_font_attributes()["stroke_width"],
-                    font_family=_font_attributes()["font_family"],
+                    x=3 * mm,
+                    y=(nline_ress * 10 + 7) * mm,
+                    fill=font_fill,
+                    stroke=font_stroke,
+                    stroke_width=font_stroke_width,
+                    font_family=font_family,
                     font_size=15 + 3,
                 )
             )
@@ -2598,61 +3280,42 @@ class Project(object):
             conflict_display_line = nline + 1 if resource_on_left else nline
             nline += 1
 
-            vac = svgwrite.container.Group()
-            conflicts = svgwrite.container.Group()
-            cday = start_date
-            while cday <= end_date:
-                # Vacations
-                diff = _time_diff(scale, start_date, cday, False)
-                opacity = 0.65
-                if scale == DRAW_WITH_WEEKLY_SCALE:
-                    opacity /= 4.0
-                if (
-                    cday.weekday() not in _not_worked_days()
-                    and cday not in VACATIONS
-                    and not r.is_available(cday)
-                ):
-                    width = 4 * mm if show_conflicts else 8 * mm
-                    vac.add(
-                        svgwrite.shapes.Rect(
-                            insert=(
-                                (diff * 10 + 1 + offset) * mm,
-                                ((conflict_display_line) * 10 + 1) * mm,
-                            ),
-                            size=(width, 8 * mm),
-                            fill=COLORS.VACATIONS.value,
-                            stroke=COLORS.VACATIONS.value,
-                            stroke_width=1,
-                            opacity=opacity,
-                        )
+            vac = _raw_svg_group()
+            conflicts = _raw_svg_group()
+            y = ((conflict_display_line) * 10 + 1) * mm
+            # Vacations: worked days (out of global vacations) when the
+            # resource is not available
+            bits = 0
+            if last_ordinal >= first_ordinal:
+                bits = r._work_calendar().bits_between(first_ordinal, last_ordinal)
+                bits &= ~global_off
+            for index in _bit_indices(bits):
+                vac.add(
+                    _svg_use(
+                        _VACATION_TEMPLATE_ID, (diffs[index] * 10 + 1 + offset) * mm, y
                     )
+                )
 
-                # Overcharge
-                if (
-                    cday.weekday() not in _not_worked_days()
-                    and cday not in VACATIONS
-                    and cday in overcharged_days
-                ):
-                    width = 4 * mm if show_vacations else 8 * mm
-                    conflicts.add(
-                        svgwrite.shapes.Rect(
-                            insert=(
-                                (diff * 10 + 1 + 4 + offset) * mm,
-                                ((conflict_display_line) * 10 + 1) * mm,
-                            ),
-                            size=(width, 8 * mm),
-                            fill="#AA0000",
-                            stroke="#AA0000",
-                            stroke_width=1,
-                            opacity=opacity,
-                        )
+            # Overcharge: only visit overcharged days inside drawing range
+            # (search_for_task_conflicts returns days in ascending order)
+            overcharged = list(overcharged_days)
+            first = bisect.bisect_left(overcharged, start_date)
+            last = bisect.bisect_right(overcharged, end_date)
+            for cday in overcharged[first:last]:
+                index = cday.toordinal() - first_ordinal
+                if global_off >> index & 1:
+                    continue
+                conflicts.add(
+                    _svg_use(
+                        _OVERCHARGE_TEMPLATE_ID,
+                        (diffs[index] * 10 + 1 + 4 + offset) * mm,
+                        y,
                     )
-
-                cday += datetime.timedelta(days=1)
+                )
 
             nb_tasks = 0
-            for t in self.get_tasks():
-                if t.get_resources() is not None and r in t.get_resources():
+            for t, t_resources in tasks_resources:
+                if r in t_resources:
                     psvg, void = t.svg(
                         prev_y=nline,
                         start=start_date,
@@ -2682,51 +3345,59 @@ class Project(object):
                     nline -= 1
 
                 if not one_line_for_tasks:
-                    ldwg.add(
-                        svgwrite.shapes.Line(
-                            start=((0) * cm, (nline) * cm),
-                            end=((maxx + 1 + offset / 10) * cm, (nline) * cm),
-                            stroke="black",
-                        )
-                    )
+                    border_ys.append(nline)
 
                 # nline += 1
                 if one_line_for_tasks:
                     nline += 1
-                    ldwg.add(
-                        svgwrite.shapes.Line(
-                            start=((0) * cm, (nline) * cm),
-                            end=((maxx + 1 + offset / 10) * cm, (nline) * cm),
-                            stroke="black",
-                        )
-                    )
+                    border_ys.append(nline)
 
-        dwg = _my_svgwrite_drawing_wrapper(filename, debug=True)
-        dwg.add(
-            svgwrite.shapes.Rect(
-                insert=(0 * cm, 0 * cm),
-                size=((maxx + 1 + offset / 10) * cm, (nline + 1) * cm),
-                fill="white",
-                stroke_width=0,
-                opacity=1,
+        if border_ys:
+            right = _fmt((maxx + 1 + offset / 10) * cm)
+            ldwg.add(
+                _svg_element(
+                    "path",
+                    d="".join(
+                        "M0,{0}H{1}".format(_fmt(y * cm), right) for y in border_ys
+                    ),
+                    fill="none",
+                    stroke="black",
+                )
             )
+
+        width = (maxx + 1 + offset / 10) * cm
+        height = (nline + 1) * cm
+        background = svgwrite.shapes.Rect(
+            insert=(0 * cm, 0 * cm),
+            size=(width, height),
+            fill="white",
+            stroke_width=0,
+            opacity=1,
         )
-        dwg.add(
-            svgwrite.shapes.Line(
-                start=((0) * cm, (nline + 1) * cm),
-                end=((maxx + 1 + offset / 10) * cm, (nline + 1) * cm),
-                stroke="black",
-                stroke_width=2,
-            )
+        bottom_line = svgwrite.shapes.Line(
+            start=((0) * cm, height),
+            end=(width, height),
+            stroke="black",
+            stroke_width=2,
+        )
+        calendar = self._svg_calendar(
+            maxx, nline - 1, start_date, today, scale, offset=offset, t0mode=t0mode
         )
 
-        dwg.add(
-            self._svg_calendar(
-                maxx, nline - 1, start_date, today, scale, offset=offset, t0mode=t0mode
+        if fast:
+            _write_svg_direct(
+                filename,
+                width,
+                height,
+                [background, bottom_line, calendar, ldwg],
             )
-        )
-        dwg.add(ldwg)
-        dwg.save(width=(maxx + 1 + offset / 10) * cm, height=(nline + 1) * cm)
+        else:
+            dwg = _my_svgwrite_drawing_wrapper(filename)
+            dwg.add(background)
+            dwg.add(bottom_line)
+            dwg.add(calendar)
+            dwg.add(ldwg)
+            dwg.save(width=width, height=height)
         return {
             "conflicts_vacations": conflicts_vacations,
             "conflicts_tasks": conflicts_tasks,
@@ -2740,11 +3411,13 @@ class Project(object):
             LOG.warning("** Empty project : {0}".format(self.name))
             return datetime.date(9999, 1, 1)
 
-        first = self.tasks[0].start_date()
-        for t in self.tasks:
-            if t.start_date() < first:
-                first = t.start_date()
-        return first
+        cache = self._cache_start_date
+        if cache is not None and cache[0] == _DAYS_VERSION:
+            return cache[1]
+        version = _DAYS_VERSION
+        start = min(t.start_date() for t in self.tasks)
+        self._cache_start_date = (version, start)
+        return start
 
     def end_date(self):
         """
@@ -2754,11 +3427,13 @@ class Project(object):
             LOG.warning("** Empty project : {0}".format(self.name))
             return datetime.date(1970, 1, 1)
 
-        last = self.tasks[0].end_date()
-        for t in self.tasks:
-            if t.end_date() > last:
-                last = t.end_date()
-        return last
+        cache = self._cache_end_date
+        if cache is not None and cache[0] == _DAYS_VERSION:
+            return cache[1]
+        version = _DAYS_VERSION
+        end = max(t.end_date() for t in self.tasks)
+        self._cache_end_date = (version, end)
+        return end
 
     def desc_svg(
         self,
@@ -2771,22 +3446,23 @@ class Project(object):
     ) -> tuple[Optional[svgwrite.container.Group], float]:
         line_char_count = int(avail_width / (font_size / 2))
 
-        text_lines = self.description.split("\n")
-        text_lines = sum(
-            (textwrap.wrap(line, width=line_char_count) for line in text_lines),
-            [self.name],
-        )
-
-        line_count = len(text_lines)
         if not self.name:
             return None, 0.0
 
+        font_family = _font_tuple().font_family
+        wrapper = textwrap.TextWrapper(width=line_char_count)
+        text_lines = [self.name]
+        for line in self.description.split("\n"):
+            text_lines.extend(wrapper.wrap(line))
+
+        line_count = len(text_lines)
+
         title_capital_chars = sum(1 for char in self.name if char.isupper())
         title_lower_chars = len(self.name) - title_capital_chars
         title_width = (
             title_capital_chars * font_size / 1.5 + title_lower_chars * font_size / 2
         )
-        max_line_char_count = max(len(line) for line in text_lines)
+        max_line_char_count = max(map(len, text_lines))
         width = int(max(title_width, max_line_char_count * font_size / 2) + 2 * margin)
         width = min(avail_width, width)
         height = line_count * font_size + 2 * margin
@@ -2824,7 +3500,7 @@ class Project(object):
                     y_top_left + margin / 2 + font_size,
                 ),  # * px_to_mm),
                 font_size=font_size,
-                font_family=_font_attributes()["font_family"],
+                font_family=font_family,
                 font_weight="bold",
             )
         )
@@ -2838,7 +3514,7 @@ class Project(object):
                         y_top_left + margin / 2 + (i + 1) * font_size,
                     ),
                     font_size=font_size,
-                    font_family=_font_attributes()["font_family"],
+                    font_family=font_family,
                     font_weight="normal",
                 )
             )
@@ -2858,7 +3534,7 @@ class Project(object):
         t0mode=False,
         show_start_end_dates=None,
         macro_mode=False,
-    ) -> tuple[svgwrite.container.Group | None, int]:
+    ) -> tuple[_raw_svg_group | None, int]:
         """
         Return (SVG code, number of lines drawn) for the project. Draws all
         tasks and add project name with a purple bar on the left side.
@@ -2873,6 +3549,7 @@ class Project(object):
         title_align_on_left -- boolean, align task title on left
         offset -- X offset from image border to start of drawing zone
         """
+        font_fill, font_stroke, font_stroke_width, font_family = _font_tuple()
         if show_start_end_dates is None:
             show_start_end_dates = not t0mode
         if start is None:
@@ -2886,7 +3563,7 @@ class Project(object):
 
         cy = prev_y + 1 * (self.name != "")
 
-        prj = svgwrite.container.Group()
+        prj = _raw_svg_group()
 
         is_macro_project = macro_mode and level > 0
         macro_drawn = False
@@ -2895,11 +3572,11 @@ class Project(object):
                 if macro_drawn:
                     continue
                 else:
-                    self.macro_task.start_date = self.start_date
-                    self.macro_task.end_date = self.end_date
                     self.macro_task.color = self.color
                     t = self.macro_task
                     macro_drawn = True
+            if not t.display:
+                continue
 
             trepr, theight = t.svg(
                 cy,
@@ -2916,35 +3593,37 @@ class Project(object):
                 prj.add(trepr)
                 cy += theight
 
-        fprj = svgwrite.container.Group()
+        fprj = _raw_svg_group()
         prj_bar = False
 
         if self.name != "":
+            sd = self.start_date()
+            ed = self.end_date()
             is_project_in_interval = (
-                start <= self.start_date() <= end
-                or start <= self.end_date() <= end
-                or self.start_date() <= start <= end <= self.end_date()
+                start <= sd <= end or start <= ed <= end or sd <= start <= end <= ed
             )
             if is_project_in_interval or level == 1:
                 fprj.add(
-                    svgwrite.text.Text(
+                    _svg_element(
+                        "text",
                         "{0}".format(self.name),
-                        insert=(
-                            (6 * level + 3 + offset) * mm,
-                            ((prev_y) * 10 + 7) * mm,
-                        ),
-                        fill=_font_attributes()["fill"],
-                        stroke=_font_attributes()["stroke"],
-                        stroke_width=_font_attributes()["stroke_width"],
-                        font_family=_font_attributes()["font_family"],
+                        x=(6 * level + 3 + offset) * mm,
+                        y=((prev_y) * 10 + 7) * mm,
+                        fill=font_fill,
+                        stroke=font_stroke,
+                        stroke_width=font_stroke_width,
+                        font_family=font_family,
                         font_size=font_size,
                     )
                 )
 
                 fprj.add(
-                    svgwrite.shapes.Rect(
-                        insert=((6 * level + 0.8 + offset) * mm, (prev_y + 0.5) * cm),
-                        size=(0.2 * cm, ((cy - prev_y - 1) + 0.4) * cm),
+                    _svg_element(
+                        "rect",
+                        x=(6 * level + 0.8 + offset) * mm,
+                        y=(prev_y + 0.5) * cm,
+                        width=0.2 * cm,
+                        height=((cy - prev_y - 1) + 0.4) * cm,
                         fill=color,
                         stroke=color,
                         stroke_width=0,
@@ -2985,7 +3664,11 @@ class Project(object):
         Keyword arguments:
         prj -- Project object to check against
         """
-        svg = svgwrite.container.Group()
+        svg = _raw_svg_group()
+        if prj is self:
+            defs = svgwrite.container.Defs()
+            defs.add(_dependency_marker())
+            svg.add(defs)
         for t in self.tasks:
             trepr = t.svg_dependencies(prj)
             if trepr is not None:
@@ -3011,8 +3694,12 @@ class Project(object):
         Reset cached elements of all tasks and project
         """
         self.cache_nb_elements = None
+        self._cache_start_date = None
+        self._cache_end_date = None
         for t in self.tasks:
             t._reset_coord()
+        # task dates are computed again: so are the days cached from them
+        _days_changed()
         return
 
     def is_in_project(self, task):
@@ -3037,35 +3724,68 @@ class Project(object):
             if r is not None:
                 rlist.append(r)
 
-        flist = []
-        for r in _flatten(rlist):
-            if r not in flist:
-                flist.append(r)
-        return flist
+        # dict keeps first occurrences in order, with hashed lookups
+        return list(dict.fromkeys(_flatten(rlist)))
 
     def get_tasks(self):
         """
         Returns flat list of Tasks used in the Project and subproject
         """
-        tlist = []
-        for t in self.tasks:
-            # if it is a sub project, recurse
-            if type(t) is type(self):
-                st = t.get_tasks()
-                tlist.append(st)
-            else:  # get task
-                tlist.append(t)
-
-        flist = []
-        for r in _flatten(tlist):
-            if r not in flist:
-                flist.append(r)
-        return flist
+        # depth first walk with a stack of iterators over project tasks, a
+        # sub project being visited once; dict keeps first occurrences in order
+        tasks = {}
+        projects = {self}
+        stack = [iter(self.tasks)]
+        while stack:
+            for t in stack[-1]:
+                if isinstance(t, Project):
+                    if t not in projects:
+                        projects.add(t)
+                        stack.append(iter(t.tasks))
+                        break
+                else:
+                    tasks[t] = None
+            else:
+                stack.pop()
+        return list(tasks)
+
+    def write_csv(self, sink, header=True):
+        """
+        Write CSV rows of project tasks to a writable text stream, without
+        checking the type of sink (see csv for filenames and binary streams)
+
+        Keyword arguments:
+        sink -- file object (text mode)
+        header -- boolean, write UTF-8 BOM and column titles first, default True
+        """
+        if header:
+            sink.write(_CSV_HEADER)
+
+        # rows are produced and filtered by builtins, without a Python loop
+        sink.writelines(filter(None, map(_TASK_CSV, self.tasks)))
+
+    def to_csv(self, header=True):
+        """
+        Return CSV text of project tasks, joined once
+
+        Keyword arguments:
+        header -- boolean, start with UTF-8 BOM and column titles, default True
+        """
+        rows = [_CSV_HEADER] if header else []
+        rows.extend(filter(None, map(_TASK_CSV, self.tasks)))
+        return "".join(rows)
 
     def csv(self, csv=None):
         """
         Create CSV output from projects
 
+        Rows are streamed to text file objects. Files given by name and binary
+        file objects receive the whole CSV encoded to UTF-8 at once. Files named
+        *.gz are gzip compressed.
+
+        Returns the CSV text (without header) if csv is None, and None when csv
+        is a filename or a file object (or when the project is empty).
+
         Keyword arguments:
         csv -- string, filename to save to OR file object OR None
         """
@@ -3073,53 +3793,38 @@ class Project(object):
             LOG.warning("** Empty project : {0}".format(self.name))
             return
 
-        if csv is not None:
-            csv_text = bytes.decode(codecs.BOM_UTF8, "utf-8")
-            csv_text += '"State";"Task Name";"Start date";"End date";"Duration";"Resources";\r\n'
-        else:
-            csv_text = ""
+        if csv is None:
+            return self.to_csv(header=False)
 
-        for t in self.tasks:
-            c = t.csv()
-            if c is not None:
-                if sys.version_info[0] == 2:
-                    try:
-                        c = unicode(c, "utf-8")
-                    except TypeError:
-                        pass
-                    csv_text += c
-                elif sys.version_info[0] == 3:
-                    csv_text += c
-                else:
-                    csv_text += c
+        binary = isinstance(csv, (io.RawIOBase, io.BufferedIOBase))
+        if hasattr(csv, "write") and not binary:
+            self.write_csv(csv)
+            return
 
-        if csv is not None:
-            test = False
-            import io
+        data = self.to_csv().encode("utf-8")
+        if binary:
+            csv.write(data)
+        elif str(csv).endswith(".gz"):
+            # fastest compression level: CSV rows compress well anyway
+            with gzip.open(csv, mode="wb", compresslevel=1) as fileobj:
+                fileobj.write(data)
+        else:
+            with io.open(csv, mode="wb", buffering=1 << 20) as fileobj:
+                fileobj.write(data)
 
-            if sys.version_info[0] == 2:
-                test = type(csv) == types.FileType or type(csv) == types.InstanceType
-            elif sys.version_info[0] == 3:
-                test = type(csv) == io.TextIOWrapper
 
-            if test:
-                csv.write(csv_text)
-            else:
-                fileobj = io.open(csv, mode="w", encoding="utf-8")
-                fileobj.write(csv_text)
-                fileobj.close()
+# MAIN -------------------
+def _run_selftest():
+    """Run non regression test (module doctests)"""
+    import doctest
 
-        return csv_text
+    doctest.testmod(verbose=False, extraglobs={})
 
 
-# MAIN -------------------
 if __name__ == "__main__":
-    import doctest
-
-    # non regression test
-    doctest.testmod()
+    _run_selftest()
 
-else:
+elif not LOG.is_initialized():
     LOG.initialize(level=logging.CRITICAL)
 
 
@@ -4,6 +4,9 @@
 # pylint: disable=no-name-in-module
 # pylint: disable=no-member
 
+import collections
+import datetime
+import hashlib
 import os
 import os.path as osp
 import shutil
@@ -13,7 +16,7 @@ from typing import Optional
 
 from guidata.configtools import get_icon
 from guidata.widgets.codeeditor import CodeEditor
-from qtpy.QtCore import Qt, Signal
+from qtpy.QtCore import Qt, QTimer, Signal
 from qtpy.QtWidgets import QSplitter, QStackedWidget, QTabWidget
 
 from planning.config import DEBUG, Conf
@@ -22,6 +25,21 @@ from planning.gui.treewidgets import TreeWidgets
 from planning.model import PlanningData
 
 
+def _write_if_changed(fname: str, data: bytes):
+    """Write data to file, unless the file already has this content
+
+    Args:
+        fname: file name
+        data: file content
+    """
+    if osp.isfile(fname) and osp.getsize(fname) == len(data):
+        with open(fname, "rb") as fdesc:
+            if fdesc.read() == data:
+                return
+    with open(fname, "wb") as fdesc:
+        fdesc.write(data)
+
+
 class PlanningEditor(QStackedWidget):
     """Planning editor widget"""
 
@@ -156,44 +174,70 @@ class PlanningPreview(QTabWidget):
         for index in reversed(range(self.count())):
             self.removeTab(index)
 
-    def update_tabs(self, fnames: list[str]):
-        """Update tabs"""
+    def update_tabs(self, fnames: list[str], digests: Optional[dict[int, str]] = None):
+        """Update tabs
+
+        Args:
+            fnames: chart filenames, one per tab
+            digests: content digests of the charts which were just generated,
+                by chart index (see SVGViewer.load)
+        """
+        # Tabs are repainted once, after all removals, moves and insertions
+        self.setUpdatesEnabled(False)
+        try:
+            self.__update_tabs(fnames, {} if digests is None else digests)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def __update_tabs(self, fnames: list[str], digests: dict[int, str]):
+        """Update tabs, without repainting them"""
         old_current = self.tabText(self.currentIndex())
         bnames = [osp.basename(fname) for fname in fnames]
         if fnames:
             self.__path = osp.dirname(fnames[0])
-        for to_remove in set(self.views.keys()) - set(bnames):
-            for index in reversed(range(self.count())):
-                if to_remove == self.tabText(index):
-                    self.removeTab(index)
-                    pop = None
-                    if to_remove in self.views:
-                        pop = self.views.pop(to_remove)
-                    if (
-                        pop is not None
-                        and self.__path is not None
-                        and osp.exists(
-                            path_to_remove := osp.join(self.__path, to_remove)
-                        )
-                    ):
-                        os.remove(path_to_remove)
+        text_to_index = {self.tabText(index): index for index in range(self.count())}
+        to_remove = set(self.views.keys()).difference(bnames)
+        # Remove tabs from the last one, so that indexes stay valid
+        for index, bname in sorted(
+            (
+                (text_to_index[bname], bname)
+                for bname in to_remove
+                if bname in text_to_index
+            ),
+            reverse=True,
+        ):
+            self.removeTab(index)
+            pop = self.views.pop(bname, None)
+            if (
+                pop is not None
+                and self.__path is not None
+                and osp.exists(path_to_remove := osp.join(self.__path, bname))
+            ):
+                os.remove(path_to_remove)
+        # Existing viewers are moved to their new position instead of being
+        # recreated
         for i, (fname, bname) in enumerate(zip(fnames, bnames)):
             if bname in self.views:
                 viewer = self.views[bname]
+                index = self.indexOf(viewer)
+                if index != i:
+                    self.tabBar().moveTab(index, i)
             else:
                 self.views[bname] = viewer = SVGViewer()
                 index = self.insertTab(i, viewer, get_icon("chart.svg"), bname)
                 self.setTabToolTip(index, fname)
-            viewer.load(fname)
+            viewer.load(fname, digests.get(i))
             if bname == old_current:
                 self.setCurrentWidget(viewer)
 
-    def update_tab(self, index: int, fname: str):
+    def update_tab(self, index: int, fname: str, digest: Optional[str] = None):
         """Updates a single SVG preview tab.
 
         Args:
             index: tab index to update
             fname: filame to rename the tab
+            digest: content digest of the chart, if it was just generated
+                (see SVGViewer.load)
         """
         if self.count() == 0:
             return
@@ -206,7 +250,7 @@ class PlanningPreview(QTabWidget):
         ):
             os.remove(path_to_remove)
         viewer = self.views.pop(prev_bname)
-        viewer.load(fname)
+        viewer.load(fname, digest)
         self.views[new_bname] = viewer
         self.setTabText(index, new_bname)
         self.setTabToolTip(index, fname)
@@ -218,6 +262,9 @@ class PlanningCentralWidget(QSplitter):
     SIG_MODIFIED = Signal()
     SIG_MESSAGE = Signal(str, int)
 
+    # Maximum number of generated SVG charts kept in memory
+    SVG_CACHE_SIZE = 128
+
     def __init__(self):
         super().__init__()
         self.setMinimumSize(850, 400)
@@ -225,6 +272,18 @@ class PlanningCentralWidget(QSplitter):
         self.setOrientation(Qt.Horizontal)
         self.path = None
         self.xml_code = None
+        self.__svg_cache: collections.OrderedDict[str, bytes] = (
+            collections.OrderedDict()
+        )
+        # Planning the preview tabs were last updated from (in XML mode, it is
+        # not the planning of the tree widgets)
+        self.__charts_planning: Optional[PlanningData] = None
+
+        # Bursts of tree changes are coalesced into a single charts update
+        self.__tree_timer = QTimer(self)
+        self.__tree_timer.setSingleShot(True)
+        self.__tree_timer.setInterval(200)
+        self.__tree_timer.timeout.connect(self.__update_charts_from_tree)
 
         self.editor = PlanningEditor(self)
         self.preview = PlanningPreview(self)
@@ -273,11 +332,11 @@ class PlanningCentralWidget(QSplitter):
         self.SIG_MODIFIED.emit()
         xmlcode = self.editor.code.toPlainText()
         try:
-            ET.fromstring(xmlcode)
+            root = ET.fromstring(xmlcode)
         except ET.ParseError:
             return
         try:
-            planning = PlanningData.from_element(PlanningData(), ET.fromstring(xmlcode))
+            planning = PlanningData.from_element(PlanningData(), root)
             planning.set_filename(self.path)
             self.update_planning_charts(planning)
         except (ValueError, KeyError, AssertionError, TypeError, AttributeError):
@@ -286,6 +345,10 @@ class PlanningCentralWidget(QSplitter):
     def tree_changed(self):
         """Tree widget has changed"""
         self.SIG_MODIFIED.emit()
+        self.__tree_timer.start()
+
+    def __update_charts_from_tree(self):
+        """Update charts after the last of a series of tree changes"""
         try:
             self.update_planning_charts()
 
@@ -298,32 +361,89 @@ class PlanningCentralWidget(QSplitter):
         Args:
             index: index of the current tab. Not used, it's a slot for Qt).
         """
-        self.update_planning_charts(self.planning)
+        self.update_planning_charts(self.__charts_planning)
 
     def update_planning_charts(
         self, planning: Optional[PlanningData] = None, force=False
     ):
-        """Update charts. Generates all of them if there are new ones,
-        or just the current one if it already exists.
+        """Update charts. Generates just the current one: the others are
+        generated when their tab is selected. All of them are generated if
+        force is True.
 
         Args:
             planning: PlanningData instance to update. If None, the current
                 planning is used.
+            force: if True, generate all charts (e.g. when saving the file)
         """
         if planning is None and (planning := self.planning) is None:
             return
+        self.__charts_planning = planning
         planning.update_chart_names()
         chart_count = len(planning.chtlist)
         if self.preview.count() != chart_count or force:
-            planning.generate_charts()
-            self.preview.update_tabs(planning.chart_filenames)
-        elif chart_count != 0:
+            digests = None
+            if force:
+                digests = self.__generate_charts(planning, list(range(chart_count)))
+            self.preview.update_tabs(planning.chart_filenames, digests)
+            if force:
+                return
+        if chart_count != 0:
             index = self.preview.currentIndex()
-            planning.generate_current_chart(index)
-            self.preview.update_tab(index, planning.chart_filenames[index])
+            digests = self.__generate_charts(planning, [index])
+            self.preview.update_tab(
+                index, planning.chart_filenames[index], digests[index]
+            )
+
+    def __generate_charts(
+        self, planning: PlanningData, indexes: list[int]
+    ) -> dict[int, str]:
+        """Generate charts, reusing the SVG of charts already generated from
+        the same planning data (charts depend on the whole planning and on the
+        current date, when their 'today' is not set)
+
+        Args:
+            planning: PlanningData instance
+            indexes: indexes of the charts to generate
+
+        Returns:
+            Digests identifying the content of the generated charts, by index
+        """
+        fnames = planning.chart_filenames
+        text = planning.to_text()
+        today = datetime.date.today().isoformat()
+        digests = {}
+        missing = {}
+        for index in indexes:
+            fname = fnames[index]
+            key = "\n".join((today, fname, text)).encode("utf-8")
+            digests[index] = digest = hashlib.blake2b(key, digest_size=16).hexdigest()
+            svg = self.__svg_cache.get(digest)
+            if svg is None:
+                missing[index] = digest
+                continue
+            self.__svg_cache.move_to_end(digest)
+            _write_if_changed(fname, svg)
+        if not missing:
+            # Calculated task dates are still expected to be updated
+            planning.process_gantt()
+            planning.update_task_calc_dates()
+            return digests
+        if len(missing) > 1:
+            planning.generate_charts()
+        else:
+            planning.generate_current_chart(next(iter(missing)))
+        for index, digest in missing.items():
+            if osp.isfile(fnames[index]):
+                with open(fnames[index], "rb") as fdesc:
+                    self.__svg_cache[digest] = fdesc.read()
+        while len(self.__svg_cache) > self.SVG_CACHE_SIZE:
+            self.__svg_cache.popitem(last=False)
+        return digests
 
     def new_file(self):
         """New file"""
+        self.__tree_timer.stop()
+        self.__charts_planning = None
         self.editor.clear_all()
         self.preview.clear_all_tabs()
 
@@ -335,6 +455,8 @@ class PlanningCentralWidget(QSplitter):
     def load_file(self, path: str):
         """Load file"""
         self.path = path
+        self.__tree_timer.stop()
+        self.__charts_planning = None
         self.editor.clear_all()
         self.preview.clear_all_tabs()
         self.editor.load_file(path)
@@ -69,15 +69,34 @@ class SVGViewer(QWebEngineView):
         self.setAttribute(Qt.WA_DeleteOnClose)
         self.setZoomFactor(0.8)
         self.__filename = None
-
-    def load(self, fname):
-        """Load from filename"""
+        self.__signature = None
+
+    def load(self, fname, digest=None):
+        """Load from filename, unless this file is already displayed and has
+        not been modified since
+
+        Args:
+            fname: SVG filename
+            digest: optional string identifying the file content. Modification
+                time and size alone may not change when a file is rewritten
+                (e.g. same size within the mtime resolution of the filesystem),
+                so files which were just regenerated should give one.
+        """
+        try:
+            stat = os.stat(fname)
+            signature = (fname, stat.st_mtime_ns, stat.st_size, digest)
+        except OSError:
+            signature = None
+        if signature is not None and signature == self.__signature:
+            return
         self.__filename = fname
+        self.__signature = signature
         super().load(QUrl(fname.replace("\\", "/")))
 
     def clear(self):
         """Clear widget"""
         self.__filename = None
+        self.__signature = None
         super().clear()
 
     def mouseDoubleClickEvent(self, event):  # pylint: disable=C0103
@@ -805,6 +805,7 @@ class ChartData(AbstractDurationData):
                 t0mode=t0mode,
                 resource_on_left=True,
                 scale=scale,
+                fast=True,
             )
         elif ptype == "t" or ptype == "m":
             project.make_svg_for_tasks(
@@ -815,6 +816,7 @@ class ChartData(AbstractDurationData):
                 scale=scale,
                 t0mode=t0mode,
                 macro_mode=(ptype == "m"),
+                fast=True,
             )
         else:
             raise ValueError(f"Invalid planning type '{ptype}'")
@@ -1349,7 +1351,7 @@ class PlanningData(AbstractData):
             self.chtlist,
             self.prjlist,
         )
-        gantt.VACATIONS = []
+        gantt.clear_vacations()
         self.process_gantt()
 
     @property
@@ -1412,9 +1414,8 @@ class PlanningData(AbstractData):
     @classmethod
     def from_filename(cls, fname: str):
         """Instantiate data set from XML file"""
-        with open(fname, "rb") as fdesc:
-            xmlcode = fdesc.read().decode("utf-8")
-        instance = cls.from_element(cls(), ET.fromstring(xmlcode))
+        # The file is fed to the parser by chunks, without being read at once
+        instance = cls.from_element(cls(), ET.parse(fname).getroot())
         instance.set_filename(fname)
         return instance
 
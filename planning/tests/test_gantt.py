@@ -5,9 +5,15 @@ Gantt test
 """
 
 import datetime
+import gzip
+import io
+import itertools
 import os
 import os.path as osp
 
+import pytest
+from dateutil.relativedelta import relativedelta
+
 from planning import gantt
 
 os.chdir(osp.dirname(__file__))
@@ -172,3 +178,379 @@ p.make_svg_for_tasks(
     scale=gantt.DRAW_WITH_WEEKLY_SCALE,
 )
 ##########################$ /MAKE DRAW ###############
+
+
+##########################$ WORK CALENDAR ###############
+def _day_range(first_day, last_day):
+    """Yields every day from first_day to last_day (included)"""
+    for ordinal in range(first_day.toordinal(), last_day.toordinal() + 1):
+        yield datetime.date.fromordinal(ordinal)
+
+
+def _reference_days_off(first_day, last_day, resource=None):
+    """Non worked days from first_day to last_day (included), day by day"""
+    days = set()
+    for day in _day_range(first_day, last_day):
+        if (
+            day.weekday() in gantt.NOT_WORKED_DAYS
+            or day in gantt.VACATIONS
+            or (resource is not None and not resource.is_available(day))
+        ):
+            days.add(day)
+    return days
+
+
+def _calendar_days_off(calendar, first_day, last_day):
+    """Non worked days from first_day to last_day (included), from a calendar"""
+    first = first_day.toordinal()
+    bits = calendar.bits_between(first, last_day.toordinal())
+    return {
+        datetime.date.fromordinal(first + index) for index in gantt._bit_indices(bits)
+    }
+
+
+def _check_calendar(calendar, first_day, last_day, resource=None):
+    """Compare a calendar with the day by day reference"""
+    expected = _reference_days_off(first_day, last_day, resource)
+    assert _calendar_days_off(calendar, first_day, last_day) == expected
+    for day in _day_range(first_day, last_day):
+        assert calendar.is_non_working(day) == (day in expected)
+        following = day
+        while following in expected:
+            following += datetime.timedelta(days=1)
+        assert calendar.next_working_day(day) == following
+
+
+# (first day, last day) of the checked spans
+CALENDAR_SPANS = [
+    # Friday to Monday, across a weekend
+    (datetime.date(2015, 1, 9), datetime.date(2015, 1, 12)),
+    # Saturday to Sunday, only days off
+    (datetime.date(2015, 1, 10), datetime.date(2015, 1, 11)),
+    # around the global and resource vacations
+    (datetime.date(2014, 12, 20), datetime.date(2015, 1, 20)),
+    # longer than the initial range of the bitset, both ways
+    (datetime.date(2014, 6, 1), datetime.date(2015, 6, 30)),
+]
+
+
+def test_work_calendar_global():
+    """Global days off (weekends and VACATIONS) match a day by day loop"""
+    for first_day, last_day in CALENDAR_SPANS:
+        _check_calendar(gantt._WorkCalendar(), first_day, last_day)
+        _check_calendar(gantt._GLOBAL_CALENDAR, first_day, last_day)
+
+
+def test_work_calendar_resource():
+    """Resource days off (global and own vacations) match a day by day loop"""
+    for first_day, last_day in CALENDAR_SPANS:
+        for resource in (rANO, rJLS):
+            _check_calendar(resource._work_calendar(), first_day, last_day, resource)
+    # nth worked day of rANO from Dec 26, 2014 (Friday)
+    day = datetime.date(2014, 12, 26)
+    worked = sorted(
+        set(_day_range(day, datetime.date(2015, 2, 28)))
+        - _reference_days_off(day, datetime.date(2015, 2, 28), rANO)
+    )
+    calendar = rANO._work_calendar()
+    for nth in range(1, 20):
+        assert calendar.nth_working_day(day, nth) == worked[nth - 1]
+        assert calendar.nth_working_day_before(worked[nth - 1], nth) == worked[0]
+
+
+def test_work_calendar_invalidation():
+    """Calendars are rebuilt after vacations are added or cleared"""
+    first_day, last_day = datetime.date(2015, 1, 19), datetime.date(2015, 1, 25)
+    wednesday = datetime.date(2015, 1, 21)
+    saved = set(gantt.VACATIONS)
+    resource = gantt.Resource("CAL")
+    calendars = (gantt._GLOBAL_CALENDAR, resource._work_calendar())
+    try:
+        for calendar in calendars:
+            assert not calendar.is_non_working(wednesday)
+        gantt.add_vacations(wednesday)
+        for calendar in calendars:
+            assert calendar.is_non_working(wednesday)
+            _check_calendar(calendar, first_day, last_day)
+        gantt.clear_vacations()
+        for calendar in calendars:
+            assert not calendar.is_non_working(wednesday)
+            _check_calendar(calendar, first_day, last_day)
+        resource.add_vacations(wednesday, datetime.date(2015, 1, 22))
+        assert not gantt._GLOBAL_CALENDAR.is_non_working(wednesday)
+        assert resource._work_calendar().is_non_working(datetime.date(2015, 1, 22))
+        _check_calendar(resource._work_calendar(), first_day, last_day, resource)
+    finally:
+        gantt.clear_vacations()
+        for day in saved:
+            gantt.add_vacations(day)
+    assert not gantt._GLOBAL_CALENDAR.is_non_working(wednesday)
+
+
+##########################$ MONTHS AND WEEKS ###############
+# month ends, leap days and days around the new year
+SCALE_DAYS = [
+    datetime.date(2015, 1, 31),
+    datetime.date(2015, 2, 28),
+    datetime.date(2015, 3, 30),
+    datetime.date(2015, 12, 31),
+    datetime.date(2016, 1, 1),
+    datetime.date(2016, 1, 29),
+    datetime.date(2016, 2, 29),
+    datetime.date(2016, 3, 31),
+    datetime.date(2019, 12, 30),
+    datetime.date(2020, 2, 29),
+    datetime.date(2021, 2, 28),
+    datetime.date(2021, 6, 15),
+]
+DAY_PAIRS = list(itertools.product(SCALE_DAYS, repeat=2))
+
+
+def _reference_time_diff(scale, start_date, end_date, duration, milestone=False):
+    """_time_diff computed with relativedelta, day by day for weeks"""
+    if scale == gantt.DRAW_WITH_DAILY_SCALE:
+        return (end_date - start_date).days
+    if scale == gantt.DRAW_WITH_WEEKLY_SCALE:
+        guess = start_date - datetime.timedelta(days=start_date.weekday())
+        while end_date.weekday() != (0 if duration else 6):
+            end_date += datetime.timedelta(days=-1 if duration else 1)
+        td = 0
+        while guess + relativedelta(days=+6) < end_date:
+            td += 1
+            guess += relativedelta(weeks=+1)
+        return td - 1 if milestone else td
+    if not duration:
+        start_date = start_date.replace(day=1)
+    rdelta = relativedelta(end_date, start_date)
+    return rdelta.months + rdelta.years * 12
+
+
+def _reference_maxx(scale, start_date, end_date):
+    """_get_maxx computed with relativedelta, day by day for weeks"""
+    if scale == gantt.DRAW_WITH_DAILY_SCALE:
+        return (end_date - start_date).days
+    if scale == gantt.DRAW_WITH_WEEKLY_SCALE:
+        guess = start_date - datetime.timedelta(days=start_date.weekday())
+        end_date += datetime.timedelta(days=6 - end_date.weekday())
+        maxx = -1
+        while guess <= end_date:
+            maxx += 1
+            guess += relativedelta(weeks=+1)
+        return maxx
+    delta = relativedelta(end_date + datetime.timedelta(days=1), start_date)
+    maxx = delta.months + delta.years * 12 - 1
+    if delta.days > 0:
+        maxx += 1
+    return maxx
+
+
+@pytest.mark.parametrize("months", [-25, -12, -1, 0, 1, 2, 11, 12, 13, 48])
+@pytest.mark.parametrize("day", SCALE_DAYS)
+def test_add_months(day, months):
+    """_add_months clips the day of month like relativedelta"""
+    assert gantt._add_months(day, months) == day + relativedelta(months=months)
+
+
+@pytest.mark.parametrize(
+    "day, months, expected",
+    [
+        (datetime.date(2015, 1, 31), 1, datetime.date(2015, 2, 28)),
+        (datetime.date(2016, 1, 31), 1, datetime.date(2016, 2, 29)),
+        (datetime.date(2016, 3, 31), -1, datetime.date(2016, 2, 29)),
+        (datetime.date(2016, 2, 29), 12, datetime.date(2017, 2, 28)),
+        (datetime.date(2016, 2, 29), 48, datetime.date(2020, 2, 29)),
+    ],
+)
+def test_add_months_clipping(day, months, expected):
+    """Month ends and leap years"""
+    assert gantt._add_months(day, months) == expected
+
+
+@pytest.mark.parametrize("start_date, end_date", DAY_PAIRS)
+def test_months_between(start_date, end_date):
+    """_months_between counts whole months like relativedelta"""
+    rdelta = relativedelta(end_date, start_date)
+    expected = rdelta.months + rdelta.years * 12
+    assert gantt._months_between(start_date, end_date) == expected
+
+
+@pytest.mark.parametrize(
+    "scale",
+    [
+        gantt.DRAW_WITH_DAILY_SCALE,
+        gantt.DRAW_WITH_WEEKLY_SCALE,
+        gantt.DRAW_WITH_MONTHLY_SCALE,
+    ],
+)
+@pytest.mark.parametrize("start_date, end_date", DAY_PAIRS)
+def test_time_diff(scale, start_date, end_date):
+    """Closed form _time_diff and _get_maxx match the relativedelta versions"""
+    for duration, milestone in itertools.product((False, True), repeat=2):
+        assert gantt._time_diff(
+            scale, start_date, end_date, duration, milestone
+        ) == _reference_time_diff(scale, start_date, end_date, duration, milestone)
+    assert gantt._get_maxx(scale, start_date, end_date) == _reference_maxx(
+        scale, start_date, end_date
+    )
+
+
+##########################$ ISO WEEKS ###############
+@pytest.mark.parametrize("year", [2014, 2015, 2019, 2020, 2026])
+def test_next_iso_week(year):
+    """Incremental ISO week numbers on every Monday, across 53 weeks years"""
+    monday = datetime.date(year, 1, 1)
+    monday += datetime.timedelta(days=-monday.weekday())
+    iso_week = None
+    while monday.year <= year + 1:
+        iso_week = gantt._next_iso_week(monday, iso_week)
+        assert iso_week == monday.isocalendar()[1]
+        monday += datetime.timedelta(days=7)
+
+
+##########################$ CSV ###############
+def test_csv_text():
+    """CSV text with and without header"""
+    rows = "".join(filter(None, (task.csv() for task in p.tasks)))
+    assert rows
+    assert p.to_csv(header=False) == rows
+    assert p.to_csv() == gantt._CSV_HEADER + rows
+    assert p.csv() == rows
+    assert gantt.Project(name="Empty").csv() is None
+
+
+def test_csv_streams():
+    """CSV written to text and binary file objects"""
+    text = io.StringIO()
+    p.write_csv(text, header=False)
+    assert text.getvalue() == p.to_csv(header=False)
+    text = io.StringIO()
+    assert p.csv(text) is None
+    assert text.getvalue() == p.to_csv()
+    binary = io.BytesIO()
+    assert p.csv(binary) is None
+    assert binary.getvalue() == p.to_csv().encode("utf-8")
+
+
+def test_csv_files(tmp_path):
+    """CSV written to plain and gzip compressed files"""
+    expected = p.to_csv().encode("utf-8")
+    for filename in (tmp_path / "test.csv", str(tmp_path / "test_str.csv")):
+        assert p.csv(filename) is None
+        with open(filename, "rb") as fileobj:
+            assert fileobj.read() == expected
+    filename = str(tmp_path / "test.csv.gz")
+    assert p.csv(filename) is None
+    with gzip.open(filename, "rb") as fileobj:
+        assert fileobj.read() == expected
+
+
+##########################$ RE-RENDERING ###############
+def _two_tasks_project():
+    """Project of two consecutive tasks T1 and T2 of a single resource"""
+    resource = gantt.Resource("RR")
+    t1 = gantt.Task(
+        name="T1", start=datetime.date(2024, 1, 1), duration=5, resources=[resource]
+    )
+    t2 = gantt.Task(
+        name="T2", start=datetime.date(2024, 1, 8), duration=5, resources=[resource]
+    )
+    project = gantt.Project(name="Re-rendered")
+    project.add_task(t1)
+    project.add_task(t2)
+    return project, resource, t1, t2
+
+
+def test_rerender_after_task_change(tmp_path):
+    """Dates computed again after tasks change, calendars kept"""
+    project, resource, t1, t2 = _two_tasks_project()
+    filename = str(tmp_path / "rerender.svg")
+    project.make_svg_for_tasks(filename=filename, today=datetime.date(2024, 1, 1))
+    assert project.end_date() == datetime.date(2024, 1, 12)
+    assert max(resource.search_for_task_conflicts(all_tasks=True)) == t2.end_date()
+    calendar = resource._work_calendar()
+    version = calendar.version
+
+    t2.duration = 30
+    t1.duration = 12
+    project.make_svg_for_tasks(filename=filename, today=datetime.date(2024, 1, 1))
+    assert t1.end_date() == datetime.date(2024, 1, 16)
+    assert project.end_date() == t2.end_date() == datetime.date(2024, 2, 16)
+    days = resource.search_for_task_conflicts(all_tasks=True)
+    assert max(days) == datetime.date(2024, 2, 16)
+    assert days[datetime.date(2024, 1, 16)] == ["T1", "T2"]
+    # no vacation nor day off changed: work calendars are not rebuilt
+    assert calendar.version == version
+
+
+def test_project_dates_after_task_change(tmp_path):
+    """First and last days of nested projects follow task changes"""
+    project, _resource, t1, t2 = _two_tasks_project()
+    parent = gantt.Project(name="Parent")
+    parent.add_task(project)
+    assert parent.start_date() == project.start_date() == datetime.date(2024, 1, 1)
+    assert parent.end_date() == project.end_date() == datetime.date(2024, 1, 12)
+
+    t1.start = datetime.date(2023, 12, 4)
+    t2.duration = 10
+    parent.make_svg_for_tasks(
+        filename=str(tmp_path / "parent.svg"), today=datetime.date(2024, 1, 1)
+    )
+    assert parent.start_date() == project.start_date() == datetime.date(2023, 12, 4)
+    assert parent.end_date() == project.end_date() == datetime.date(2024, 1, 19)
+
+
+def test_resource_task_days():
+    """Days of a resource tasks, in ascending order, returned as copies"""
+    resource = gantt.Resource("DAYS")
+    march = gantt.Task(
+        name="March", start=datetime.date(2024, 3, 4), duration=2, resources=[resource]
+    )
+    gantt.Task(
+        name="January",
+        start=datetime.date(2024, 1, 8),
+        duration=2,
+        resources=[resource],
+    )
+    gantt.Task(
+        name="Overlap",
+        start=datetime.date(2024, 3, 5),
+        duration=1,
+        resources=[resource],
+    )
+    assert resource.tasks[0] is march
+    days = resource.search_for_task_conflicts(all_tasks=True)
+    assert list(days) == sorted(days)
+    assert list(days)[0] == datetime.date(2024, 1, 8)
+    conflicts = resource.search_for_task_conflicts()
+    assert conflicts == {datetime.date(2024, 3, 5): ["March", "Overlap"]}
+
+    january, overlap = datetime.date(2024, 1, 8), datetime.date(2024, 3, 5)
+    days[january].append("X")
+    conflicts[overlap].append("X")
+    assert resource.search_for_task_conflicts(all_tasks=True)[january] == ["January"]
+    assert resource.search_for_task_conflicts()[overlap] == ["March", "Overlap"]
+
+
+def test_conflicts_after_task_change(tmp_path, monkeypatch):
+    """Overcharged days compiled again when tasks change, logged on each call"""
+    warnings = []
+    monkeypatch.setattr(gantt.LOG, "warning", warnings.append)
+    project, resource, t1, _t2 = _two_tasks_project()
+    filename = str(tmp_path / "conflicts.svg")
+    project.make_svg_for_resources(
+        filename=filename, today=datetime.date(2024, 1, 1), resources=[resource]
+    )
+    assert resource.search_for_task_conflicts() == {}
+
+    t1.duration = 7
+    project.make_svg_for_resources(
+        filename=filename, today=datetime.date(2024, 1, 1), resources=[resource]
+    )
+    expected = {
+        datetime.date(2024, 1, 8): ["T1", "T2"],
+        datetime.date(2024, 1, 9): ["T1", "T2"],
+    }
+    del warnings[:]
+    assert resource.search_for_task_conflicts() == expected
+    assert resource.search_for_task_conflicts() == expected
+    assert len(warnings) == 2 * len(expected)